@@ -1,26 +1,100 @@
 from __future__ import annotations
 
 import json
+import os
+import queue
 import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
+# team_root/אתר/app/db.py -> team_root/אתר/data/talmid.db
+_DB_PATH = Path(__file__).resolve().parents[1] / "data" / "talmid.db"
+
+# Display order of group levels; anything else sorts last.
+GROUP_NAME_RANK = {"מדעית": 0, "א": 1, "א1": 2, "מקדמת": 3}
+GROUP_NAME_RANK_DEFAULT = 9
+
+_READ_POOL_SIZE = max(1, int(os.environ.get("TALMID_DB_POOL_SIZE", "4")))
+_read_pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+_readers_opened = 0
+_pool_lock = threading.Lock()
+_writer: sqlite3.Connection | None = None
+_writer_lock = threading.Lock()
+# journal_mode=WAL is stored in the database file; switch it once per process.
+_wal_paths: set[str] = set()
+_wal_lock = threading.Lock()
+
 
 def get_db_path() -> Path:
-    # team_root/אתר/app/db.py -> team_root/אתר/data/talmid.db
-    site_root = Path(__file__).resolve().parents[1]
-    return site_root / "data" / "talmid.db"
+    return _DB_PATH
 
 
-def connect() -> sqlite3.Connection:
+def connect(check_same_thread: bool = True) -> sqlite3.Connection:
     db_path = get_db_path()
     db_path.parent.mkdir(parents=True, exist_ok=True)
 
-    conn = sqlite3.connect(str(db_path))
+    # Handlers reuse a fixed set of SQL strings; keep all of them prepared.
+    conn = sqlite3.connect(str(db_path), cached_statements=256, check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA busy_timeout = 5000")
     conn.execute("PRAGMA foreign_keys = ON")
+    # WAL lets readers run alongside the writer; NORMAL sync is safe in WAL mode.
+    # Connections are opened from threadpool workers; hold the lock across the
+    # switch so no other connection proceeds before the DB is in WAL mode.
+    path_key = str(db_path)
+    with _wal_lock:
+        if path_key not in _wal_paths:
+            conn.execute("PRAGMA journal_mode = WAL")
+            _wal_paths.add(path_key)
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA mmap_size = 268435456")
+    conn.execute("PRAGMA cache_size = -65536")
     return conn
 
 
+def _acquire_reader() -> sqlite3.Connection:
+    global _readers_opened
+    try:
+        return _read_pool.get_nowait()
+    except queue.Empty:
+        pass
+    with _pool_lock:
+        if _readers_opened < _READ_POOL_SIZE:
+            _readers_opened += 1
+            conn = connect(check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON")
+            return conn
+    return _read_pool.get()
+
+
+@contextmanager
+def get_connection(write: bool = False) -> Iterator[sqlite3.Connection]:
+    # Borrow a long-lived pooled connection instead of opening the DB per request.
+    # Readers come from a small query_only pool; write=True hands out the single
+    # writer connection and commits (or rolls back) when the block ends.
+    global _writer
+    if write:
+        with _writer_lock:
+            if _writer is None:
+                _writer = connect(check_same_thread=False)
+            try:
+                yield _writer
+                _writer.commit()
+            except BaseException:
+                _writer.rollback()
+                raise
+        return
+
+    conn = _acquire_reader()
+    try:
+        yield conn
+    finally:
+        _read_pool.put(conn)
+
+
 def migrate(conn: sqlite3.Connection) -> None:
     conn.executescript(
         """
@@ -29,10 +103,12 @@ def migrate(conn: sqlite3.Connection) -> None:
             value TEXT
         );
 
+        -- Text-keyed tables are WITHOUT ROWID: the PK is the table B-tree itself
+        -- (applies to new DB files; existing ones keep their layout).
         CREATE TABLE IF NOT EXISTS teachers (
             id TEXT PRIMARY KEY,
             name TEXT NOT NULL UNIQUE
-        );
+        ) WITHOUT ROWID;
 
         CREATE TABLE IF NOT EXISTS groups (
             id TEXT PRIMARY KEY,
@@ -40,8 +116,9 @@ def migrate(conn: sqlite3.Connection) -> None:
             subject TEXT NOT NULL,
             group_name TEXT NOT NULL,
             variant TEXT,
-            folder TEXT NOT NULL UNIQUE
-        );
+            folder TEXT NOT NULL UNIQUE,
+            group_name_rank INTEGER NOT NULL DEFAULT 9
+        ) WITHOUT ROWID;
 
         CREATE TABLE IF NOT EXISTS group_teachers (
             group_id TEXT NOT NULL,
@@ -49,13 +126,13 @@ def migrate(conn: sqlite3.Connection) -> None:
             PRIMARY KEY (group_id, teacher_id),
             FOREIGN KEY (group_id) REFERENCES groups(id) ON DELETE CASCADE,
             FOREIGN KEY (teacher_id) REFERENCES teachers(id) ON DELETE CASCADE
-        );
+        ) WITHOUT ROWID;
 
         CREATE TABLE IF NOT EXISTS homerooms (
             code TEXT PRIMARY KEY,
             grade TEXT NOT NULL,
             type TEXT NOT NULL
-        );
+        ) WITHOUT ROWID;
 
         CREATE TABLE IF NOT EXISTS homeroom_teachers (
             homeroom_code TEXT NOT NULL,
@@ -63,7 +140,7 @@ def migrate(conn: sqlite3.Connection) -> None:
             PRIMARY KEY (homeroom_code, teacher_id),
             FOREIGN KEY (homeroom_code) REFERENCES homerooms(code) ON DELETE CASCADE,
             FOREIGN KEY (teacher_id) REFERENCES teachers(id) ON DELETE CASCADE
-        );
+        ) WITHOUT ROWID;
 
         CREATE TABLE IF NOT EXISTS students (
             id TEXT PRIMARY KEY,
@@ -85,7 +162,7 @@ def migrate(conn: sqlite3.Connection) -> None:
             PRIMARY KEY (group_id, student_id),
             FOREIGN KEY (group_id) REFERENCES groups(id) ON DELETE CASCADE,
             FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
-        );
+        ) WITHOUT ROWID;
 
         -- Keep flexible metrics: some are explicit columns, plus JSON blob.
         CREATE TABLE IF NOT EXISTS student_metrics (
@@ -97,7 +174,7 @@ def migrate(conn: sqlite3.Connection) -> None:
             extra_json TEXT,
             updated_at TEXT,
             FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE
-        );
+        ) WITHOUT ROWID;
         """
     )
 
@@ -106,6 +183,14 @@ def migrate(conn: sqlite3.Connection) -> None:
     if "external_id" not in cols:
         conn.execute("ALTER TABLE students ADD COLUMN external_id TEXT")
 
+    cols = {row[1] for row in conn.execute("PRAGMA table_info(groups)").fetchall()}
+    if "group_name_rank" not in cols:
+        conn.execute(
+            f"ALTER TABLE groups ADD COLUMN group_name_rank INTEGER NOT NULL DEFAULT {GROUP_NAME_RANK_DEFAULT}"
+        )
+        for name, rank in GROUP_NAME_RANK.items():
+            conn.execute("UPDATE groups SET group_name_rank = ? WHERE group_name = ?", (rank, name))
+
     # external_id is optional, but when present it should be unique.
     conn.execute(
         """
@@ -114,9 +199,31 @@ def migrate(conn: sqlite3.Connection) -> None:
         WHERE external_id IS NOT NULL AND external_id != ''
         """
     )
+
+    # Secondary indexes for the non-leading FK columns / filters used in joins.
+    conn.executescript(
+        """
+        CREATE INDEX IF NOT EXISTS idx_group_teachers_teacher ON group_teachers(teacher_id);
+        CREATE INDEX IF NOT EXISTS idx_group_memberships_student ON group_memberships(student_id);
+        CREATE INDEX IF NOT EXISTS idx_homeroom_teachers_teacher ON homeroom_teachers(teacher_id);
+        CREATE INDEX IF NOT EXISTS idx_students_grade ON students(grade);
+        CREATE INDEX IF NOT EXISTS idx_students_homeroom ON students(homeroom_code);
+        CREATE INDEX IF NOT EXISTS idx_students_full_name ON students(full_name);
+        CREATE INDEX IF NOT EXISTS idx_groups_grade_subject ON groups(grade, subject);
+        CREATE INDEX IF NOT EXISTS idx_groups_sort ON groups(subject, grade, group_name_rank, variant, folder);
+
+        -- Pretty URLs resolve entities by the last 6 chars of their id.
+        CREATE INDEX IF NOT EXISTS idx_students_id_suffix ON students(substr(id, -6));
+        CREATE INDEX IF NOT EXISTS idx_teachers_id_suffix ON teachers(substr(id, -6));
+        CREATE INDEX IF NOT EXISTS idx_groups_id_suffix ON groups(substr(id, -6));
+        """
+    )
+    conn.execute("ANALYZE")
     conn.commit()
 
 
+# Only used for the user-submitted extra_json, so stay on stdlib json: orjson turns
+# integers wider than 64 bits into floats (and can't dump them) and rejects NaN/Infinity.
 def json_dumps(value: object) -> str:
     return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
 
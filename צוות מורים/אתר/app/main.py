@@ -1,15 +1,24 @@
 from __future__ import annotations
 
+import os
+import re
+import sqlite3
+import time
+from collections import defaultdict
 from datetime import datetime
+from functools import lru_cache, wraps
 from pathlib import Path
+from urllib.parse import quote
 
 from fastapi import FastAPI, Form, HTTPException, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
 from markdown_it import MarkdownIt
+from starlette.datastructures import Headers
 
-from .db import connect, json_loads, json_dumps, migrate
+from .db import get_connection, json_loads, json_dumps, migrate
 
 
 APP_TITLE = "TALMID – ניהול תלמידים"
@@ -17,33 +26,185 @@ APP_TITLE = "TALMID – ניהול תלמידים"
 app = FastAPI(title=APP_TITLE)
 
 BASE_DIR = Path(__file__).resolve().parent
+# team_root/אתר/app -> team_root
+_TEAM_ROOT = BASE_DIR.parents[1]
+_INFO_MD = _TEAM_ROOT / "מידע_חשוב.md"
+_UPDATES_MD = _TEAM_ROOT / "עדכונים_חשובים.md"
+
+# Behind nginx: when the proxy sends "X-Accel-Support", answer with an
+# X-Accel-Redirect to its internal location (alias of app/static) and let it
+# send the file. Plain uvicorn keeps the regular StaticFiles behaviour.
+_STATIC_ACCEL_PREFIX = "/static-internal/"
+
+
+class _StaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        if not Headers(scope=scope).get("x-accel-support"):
+            return super().file_response(full_path, stat_result, scope, status_code)
+        return Response(
+            status_code=status_code,
+            headers={"X-Accel-Redirect": _STATIC_ACCEL_PREFIX + quote(self.get_path(scope).replace("\\", "/"))},
+        )
+
 
-app.mount("/static", StaticFiles(directory=str(BASE_DIR / "static")), name="static")
+app.mount("/static", _StaticFiles(directory=str(BASE_DIR / "static")), name="static")
 
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+# Persist compiled templates next to the DB so restarts skip re-parsing.
+_JINJA_CACHE_DIR = BASE_DIR.parent / "data" / "jinja_cache"
+_JINJA_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+templates.env.bytecode_cache = FileSystemBytecodeCache(str(_JINJA_CACHE_DIR))
+# In production templates only change on deploy; skip the per-render mtime check.
+if os.environ.get("TALMID_ENV") == "production":
+    templates.env.auto_reload = False
 md = MarkdownIt("commonmark")
 
 
+@lru_cache(maxsize=256)
+def _render_markdown(src: str) -> str:
+    # Markdown sources here are static files; reuse the HTML for repeated input.
+    return md.render(src)
+
+
+@lru_cache(maxsize=8)
+def _render_md_file(path_str: str, mtime_ns: int) -> str:
+    # Keyed by mtime so an edited file is re-read and re-rendered.
+    return md.render(Path(path_str).read_text(encoding="utf-8"))
+
+
+def _md_file_html(md_path: Path, missing_text: str) -> str:
+    try:
+        st = md_path.stat()
+    except FileNotFoundError:
+        return _render_markdown(missing_text)
+    return _render_md_file(str(md_path), st.st_mtime_ns)
+
+# Hot queries live in module constants so every request passes the same SQL
+# text and hits the connection's statement cache (see db.connect()).
+_SQL_STUDENT_COUNTS_BY_GRADE = (
+    "SELECT grade, COUNT(*) AS c FROM students WHERE grade IN ('ז', 'ח', 'ט') GROUP BY grade"
+)
+
+_SQL_HOME_SUMMARY = """
+    SELECT
+      (SELECT COUNT(*) FROM students) AS total,
+      (SELECT value FROM app_meta WHERE key='last_sync_at') AS last_sync_at
+"""
+
+_SQL_DASHBOARD_TOTALS = """
+    SELECT
+      (SELECT COUNT(*) FROM students) AS total_students,
+      (SELECT COUNT(*) FROM groups) AS total_groups,
+      (SELECT COUNT(*) FROM teachers) AS total_teachers,
+      (SELECT value FROM app_meta WHERE key='last_sync_at') AS last_sync_at
+"""
+
+_SQL_DASHBOARD_GROUP_SIZES = """
+    SELECT g.id, g.grade, g.subject, g.group_name, g.variant, g.folder,
+           (SELECT COUNT(*) FROM group_memberships gm WHERE gm.group_id=g.id) AS student_count
+    FROM groups g
+    ORDER BY student_count DESC, g.grade, g.subject, g.group_name
+    LIMIT 12
+"""
+
+_SQL_DASHBOARD_TEACHER_LOAD = """
+    SELECT t.id, t.name,
+           COUNT(DISTINCT gt.group_id) AS group_count,
+           COUNT(DISTINCT gm.student_id) AS student_count
+    FROM teachers t
+    LEFT JOIN group_teachers gt ON gt.teacher_id=t.id
+    LEFT JOIN group_memberships gm ON gm.group_id=gt.group_id
+    GROUP BY t.id, t.name
+    ORDER BY student_count DESC, t.name
+    LIMIT 12
+"""
+
+_SQL_DASHBOARD_METRICS = """
+    SELECT
+      AVG(math_term_grade) AS avg_term,
+      AVG(math_test1) AS avg_test1,
+      AVG(math_test2) AS avg_test2,
+      COUNT(*) AS rows
+    FROM student_metrics
+"""
+
+_SQL_GRADE_TOTAL = "SELECT COUNT(*) AS c FROM students WHERE grade = ?"
+
+_SQL_GRADE_GROUPS = """
+    SELECT g.id, g.grade, g.subject, g.group_name, g.variant, g.folder,
+           (SELECT COUNT(*) FROM group_memberships gm WHERE gm.group_id=g.id) AS student_count
+    FROM groups g
+    WHERE g.grade = ? AND g.subject = 'מתמטיקה'
+    ORDER BY
+        g.group_name_rank,
+        g.variant,
+        g.folder
+"""
+
+_SQL_GRADE_GROUP_TEACHERS = """
+    SELECT gt.group_id, t.id, t.name
+    FROM teachers t
+    JOIN group_teachers gt ON gt.teacher_id=t.id
+    JOIN groups g ON g.id=gt.group_id
+    WHERE g.grade = ? AND g.subject = 'מתמטיקה'
+    ORDER BY t.name
+"""
+
+_SQL_TEACHER_GROUPS = """
+    SELECT g.id, g.grade, g.subject, g.group_name, g.variant, g.folder,
+           (SELECT COUNT(*) FROM group_memberships gm WHERE gm.group_id=g.id) AS student_count
+    FROM groups g
+    JOIN group_teachers gt ON gt.group_id=g.id
+    WHERE gt.teacher_id = ? AND g.subject = 'מתמטיקה'
+    ORDER BY
+        g.grade,
+        g.group_name_rank,
+        g.variant,
+        g.folder
+"""
+
+_SQL_HOMEROOM_STUDENTS = """
+    SELECT s.id, s.first_name, s.last_name, s.full_name
+    FROM students s
+    WHERE s.homeroom_code = ?
+    ORDER BY COALESCE(s.last_name, s.full_name), COALESCE(s.first_name, '')
+"""
+
+_SQL_HOMEROOM_MATH_GROUPS = """
+    SELECT gm.student_id, g.id, g.grade, g.subject, g.group_name, g.variant, g.folder
+    FROM students s
+    JOIN group_memberships gm ON gm.student_id=s.id
+    JOIN groups g ON g.id=gm.group_id
+    WHERE s.homeroom_code=? AND g.subject='מתמטיקה'
+    ORDER BY
+        gm.student_id,
+        g.group_name_rank,
+        g.variant,
+        g.folder
+"""
+
+
 def _url_grade(grade: str) -> str:
     return f"/שכבה/{grade}"
 
 
+class _SlugTable(dict):
+    # str.translate table: drop quotes, keep alnum and "-_ ", everything else
+    # becomes a space. Unknown code points are classified once and memoized.
+    def __missing__(self, cp: int) -> int:
+        ch = chr(cp)
+        out = cp if (ch.isalnum() or ch in "-_ ") else ord(" ")
+        self[cp] = out
+        return out
+
+
+_SLUG_TRANS = _SlugTable({ord(ch): None for ch in "\"'׳״"})
+
+
+@lru_cache(maxsize=2048)
 def _safe_slug(text: str) -> str:
-    s = (text or "").strip()
-    s = s.replace("\"", "").replace("'", "").replace("׳", "").replace("״", "")
-    s = s.replace("/", " ").replace("\\", " ")
-    s = " ".join(s.split())
-    if not s:
-        return "item"
-    out = []
-    for ch in s:
-        if ch.isalnum() or ch in ["-", "_", " "]:
-            out.append(ch)
-        else:
-            out.append(" ")
-    s2 = "".join(out)
-    s2 = " ".join(s2.split())
-    return s2.replace(" ", "-")[:80] or "item"
+    s = " ".join((text or "").translate(_SLUG_TRANS).split())
+    return s.replace(" ", "-")[:80] or "item"
 
 
 def _short_id(entity_id: str) -> str:
@@ -90,72 +251,94 @@ def _url_homeroom(code: str) -> str:
     return f"/כיתה/{code}"
 
 
+# IDs are sha1 hex snippets in this project.
+_SHORT_ID_RE = re.compile(r"-([0-9a-fA-F]{6})\Z")
+
+
 def _extract_short_id_from_slug(slug: str) -> str:
     # expecting something like "some-name-1a2b3c"
-    s = (slug or "").strip()
-    if "-" not in s:
-        return ""
-    tail = s.rsplit("-", 1)[-1]
-    if len(tail) != 6:
-        return ""
-    # IDs are sha1 hex snippets in this project.
-    if not all(ch in "0123456789abcdef" for ch in tail.lower()):
-        return ""
-    return tail.lower()
+    m = _SHORT_ID_RE.search((slug or "").strip())
+    return m.group(1).lower() if m else ""
 
 
 def _crumb(label: str, url: str | None = None) -> dict[str, str | None]:
     return {"label": label, "url": url}
 
 
+_THEME_CLASSES = {"ז": "theme-z", "ח": "theme-h", "ט": "theme-t"}
+
+
 def _theme_class(grade: str | None) -> str:
-    if grade == "ז":
-        return "theme-z"
-    if grade == "ח":
-        return "theme-h"
-    if grade == "ט":
-        return "theme-t"
-    return ""
+    return _THEME_CLASSES.get(grade, "")
 
 
 def _with_common_context(request: Request, theme: str | None = None, **extra):
     return {
         "request": request,
         "app_title": APP_TITLE,
-        "now": datetime.now(),
+        "now": getattr(request.state, "now", None) or datetime.now(),
         "theme_class": _theme_class(theme),
         "url_grade": _url_grade,
         "url_group": _url_group_row,
         "url_student": _url_student_row,
         "url_teacher": _url_teacher_row,
         "url_homeroom": _url_homeroom,
+        "render_md": _render_markdown,
         **extra,
     }
 
 
+# Rendered HTML of pages that look the same for every visitor, one entry per
+# handler. The handlers take no parameters, so the client's query string is left
+# out of the key and the cache can never hold more than one page per handler.
+# Short TTL so a CLI sync shows up within seconds; metric updates clear it immediately.
+_PAGE_CACHE_TTL = 5.0
+_page_cache: dict[str, tuple[float, bytes]] = {}
+
+
+def _cached_page(handler):
+    @wraps(handler)
+    def wrapper(request: Request):
+        key = handler.__name__
+        now = time.monotonic()
+        hit = _page_cache.get(key)
+        if hit and hit[0] > now:
+            return HTMLResponse(hit[1])
+        response = handler(request)
+        _page_cache[key] = (now + _PAGE_CACHE_TTL, response.body)
+        return response
+
+    return wrapper
+
+
+def _student_counts_by_grade(conn) -> dict[str, int]:
+    rows = conn.execute(_SQL_STUDENT_COUNTS_BY_GRADE).fetchall()
+    return {r["grade"]: r["c"] for r in rows}
+
+
+@app.middleware("http")
+async def _stamp_request_time(request: Request, call_next):
+    # One clock read per request; templates get it via _with_common_context.
+    request.state.now = datetime.now()
+    return await call_next(request)
+
+
 @app.on_event("startup")
 def _startup() -> None:
-    conn = connect()
-    migrate(conn)
-    conn.close()
+    with get_connection(write=True) as conn:
+        migrate(conn)
 
 
 @app.get("/", response_class=HTMLResponse)
+@_cached_page
 def home(request: Request):
-    conn = connect()
-    try:
-        total = conn.execute("SELECT COUNT(*) AS c FROM students").fetchone()["c"]
-        last_sync_at = conn.execute(
-            "SELECT value FROM app_meta WHERE key='last_sync_at'",
-        ).fetchone()
-        last_sync_at = last_sync_at["value"] if last_sync_at else None
+    with get_connection() as conn:
+        summary = conn.execute(_SQL_HOME_SUMMARY).fetchone()
+        total = summary["total"]
+        last_sync_at = summary["last_sync_at"]
         grades = ["ז", "ח", "ט"]
-        per_grade = {}
-        for g in grades:
-            per_grade[g] = conn.execute(
-                "SELECT COUNT(*) AS c FROM students WHERE grade = ?",
-                (g,),
-            ).fetchone()["c"]
+        counts = _student_counts_by_grade(conn)
+        per_grade = {g: counts.get(g, 0) for g in grades}
 
         return templates.TemplateResponse(
             "home.html",
@@ -168,66 +351,28 @@ def home(request: Request):
                 last_sync_at=last_sync_at,
             ),
         )
-    finally:
-        conn.close()
 
 
 @app.get("/דשבורד", response_class=HTMLResponse)
+@_cached_page
 def dashboard(request: Request):
-    conn = connect()
-    try:
-        total_students = conn.execute("SELECT COUNT(*) AS c FROM students").fetchone()["c"]
-        total_groups = conn.execute("SELECT COUNT(*) AS c FROM groups").fetchone()["c"]
-        total_teachers = conn.execute("SELECT COUNT(*) AS c FROM teachers").fetchone()["c"]
-
-        last_sync_at = conn.execute(
-            "SELECT value FROM app_meta WHERE key='last_sync_at'",
-        ).fetchone()
-        last_sync_at = last_sync_at["value"] if last_sync_at else None
+    with get_connection() as conn:
+        totals = conn.execute(_SQL_DASHBOARD_TOTALS).fetchone()
+        total_students = totals["total_students"]
+        total_groups = totals["total_groups"]
+        total_teachers = totals["total_teachers"]
+        last_sync_at = totals["last_sync_at"]
 
         grades = ["ז", "ח", "ט"]
-        per_grade_values = [
-            conn.execute("SELECT COUNT(*) AS c FROM students WHERE grade=?", (g,)).fetchone()["c"]
-            for g in grades
-        ]
+        counts = _student_counts_by_grade(conn)
+        per_grade_values = [counts.get(g, 0) for g in grades]
 
-        group_sizes = conn.execute(
-            """
-            SELECT g.id, g.grade, g.subject, g.group_name, g.variant, g.folder,
-                   (SELECT COUNT(*) FROM group_memberships gm WHERE gm.group_id=g.id) AS student_count
-            FROM groups g
-            ORDER BY student_count DESC, g.grade, g.subject, g.group_name
-            LIMIT 12
-            """
-        ).fetchall()
+        group_sizes = conn.execute(_SQL_DASHBOARD_GROUP_SIZES).fetchall()
 
-        teacher_load = conn.execute(
-            """
-            SELECT t.id, t.name,
-                   (SELECT COUNT(*) FROM group_teachers gt WHERE gt.teacher_id=t.id) AS group_count,
-                   (
-                     SELECT COUNT(DISTINCT gm.student_id)
-                     FROM group_teachers gt
-                     JOIN group_memberships gm ON gm.group_id=gt.group_id
-                     WHERE gt.teacher_id=t.id
-                   ) AS student_count
-            FROM teachers t
-            ORDER BY student_count DESC, t.name
-            LIMIT 12
-            """
-        ).fetchall()
+        teacher_load = conn.execute(_SQL_DASHBOARD_TEACHER_LOAD).fetchall()
 
         # Metrics summary (ignores missing)
-        metrics_summary = conn.execute(
-            """
-            SELECT
-              AVG(math_term_grade) AS avg_term,
-              AVG(math_test1) AS avg_test1,
-              AVG(math_test2) AS avg_test2,
-              COUNT(*) AS rows
-            FROM student_metrics
-            """
-        ).fetchone()
+        metrics_summary = conn.execute(_SQL_DASHBOARD_METRICS).fetchone()
 
         return templates.TemplateResponse(
             "dashboard.html",
@@ -246,8 +391,6 @@ def dashboard(request: Request):
                 metrics_summary=metrics_summary,
             ),
         )
-    finally:
-        conn.close()
 
 
 # Canonical Hebrew URLs
@@ -259,43 +402,42 @@ def grade_page_he(request: Request, grade: str):
 @app.get("/הקבצה/{grade}/{subject}/{slug}", response_class=HTMLResponse)
 def group_page_pretty(request: Request, grade: str, subject: str, slug: str):
     # Resolve by short-id suffix if present, else by folder leaf
-    conn = connect()
-    try:
+    group_id = None
+    with get_connection() as conn:
         short_id = _extract_short_id_from_slug(slug)
         if short_id:
             row = conn.execute(
-                "SELECT id FROM groups WHERE grade=? AND subject=? AND id LIKE '%' || ? LIMIT 2",
+                "SELECT id FROM groups WHERE grade=? AND subject=? AND substr(id, -6) = ? LIMIT 2",
                 (grade, subject, short_id),
             ).fetchall()
             if len(row) == 1:
-                return _render_group_page(request, row[0]["id"])
-
-        # fallback: treat as folder leaf
-        leaf = slug.rsplit("-", 1)[0] if "-" in slug else slug
-        folder = f"הקבצות/{grade}/{subject}/{leaf}"
-        gid = conn.execute(
-            "SELECT id FROM groups WHERE folder = ? LIMIT 1",
-            (folder,),
-        ).fetchone()
-        if gid:
-            return _render_group_page(request, gid["id"])
-
+                group_id = row[0]["id"]
+
+        if group_id is None:
+            # fallback: treat as folder leaf
+            leaf = slug.rsplit("-", 1)[0] if "-" in slug else slug
+            folder = f"הקבצות/{grade}/{subject}/{leaf}"
+            gid = conn.execute(
+                "SELECT id FROM groups WHERE folder = ? LIMIT 1",
+                (folder,),
+            ).fetchone()
+            if gid:
+                group_id = gid["id"]
+
+    if group_id is None:
         raise HTTPException(status_code=404)
-    finally:
-        conn.close()
+    # Render outside the `with` so nested calls never hold two pooled connections.
+    return _render_group_page(request, group_id)
 
 
 @app.get("/הקבצה/{group_id}", include_in_schema=False)
 def group_page_he_legacy_id(group_id: str):
     # Redirect /הקבצה/{id} -> pretty URL
-    conn = connect()
-    try:
+    with get_connection() as conn:
         g = conn.execute("SELECT * FROM groups WHERE id=?", (group_id,)).fetchone()
         if not g:
             raise HTTPException(status_code=404)
         return RedirectResponse(url=_url_group_row(g), status_code=307)
-    finally:
-        conn.close()
 
 
 @app.get("/תלמיד/{slug}", response_class=HTMLResponse)
@@ -303,14 +445,11 @@ def student_page_pretty(request: Request, slug: str):
     short_id = _extract_short_id_from_slug(slug)
     if not short_id:
         raise HTTPException(status_code=404)
-    conn = connect()
-    try:
-        rows = conn.execute("SELECT id FROM students WHERE id LIKE '%' || ? LIMIT 2", (short_id,)).fetchall()
-        if len(rows) != 1:
-            raise HTTPException(status_code=404)
-        return _render_student_page(request, rows[0]["id"])
-    finally:
-        conn.close()
+    with get_connection() as conn:
+        rows = conn.execute("SELECT id FROM students WHERE substr(id, -6) = ? LIMIT 2", (short_id,)).fetchall()
+    if len(rows) != 1:
+        raise HTTPException(status_code=404)
+    return _render_student_page(request, rows[0]["id"])
 
 
 @app.post("/תלמיד/{slug}/מדדים")
@@ -326,14 +465,11 @@ def update_student_metrics_pretty(
     short_id = _extract_short_id_from_slug(slug)
     if not short_id:
         raise HTTPException(status_code=404)
-    conn = connect()
-    try:
-        rows = conn.execute("SELECT id FROM students WHERE id LIKE '%' || ? LIMIT 2", (short_id,)).fetchall()
-        if len(rows) != 1:
-            raise HTTPException(status_code=404)
-        student_id = rows[0]["id"]
-    finally:
-        conn.close()
+    with get_connection() as conn:
+        rows = conn.execute("SELECT id FROM students WHERE substr(id, -6) = ? LIMIT 2", (short_id,)).fetchall()
+    if len(rows) != 1:
+        raise HTTPException(status_code=404)
+    student_id = rows[0]["id"]
 
     return update_student_metrics(
         request,
@@ -351,14 +487,11 @@ def teacher_page_pretty(request: Request, slug: str):
     short_id = _extract_short_id_from_slug(slug)
     if not short_id:
         raise HTTPException(status_code=404)
-    conn = connect()
-    try:
-        rows = conn.execute("SELECT id FROM teachers WHERE id LIKE '%' || ? LIMIT 2", (short_id,)).fetchall()
-        if len(rows) != 1:
-            raise HTTPException(status_code=404)
-        return _render_teacher_page(request, rows[0]["id"])
-    finally:
-        conn.close()
+    with get_connection() as conn:
+        rows = conn.execute("SELECT id FROM teachers WHERE substr(id, -6) = ? LIMIT 2", (short_id,)).fetchall()
+    if len(rows) != 1:
+        raise HTTPException(status_code=404)
+    return _render_teacher_page(request, rows[0]["id"])
 
 
 @app.get("/כיתה/{code}", response_class=HTMLResponse)
@@ -382,32 +515,19 @@ def updates_page_he(request: Request):
 
 
 @app.get("/מורים", response_class=HTMLResponse)
+@_cached_page
 def teachers_index(request: Request):
-    conn = connect()
-    try:
+    with get_connection() as conn:
         teachers = conn.execute(
             """
             SELECT t.id, t.name,
-                                     (
-                                         SELECT COUNT(*)
-                                         FROM group_teachers gt
-                                         JOIN groups g ON g.id = gt.group_id
-                                         WHERE gt.teacher_id=t.id AND g.subject = 'מתמטיקה'
-                                     ) AS group_count,
-                   (
-                     SELECT COUNT(DISTINCT gm.student_id)
-                     FROM group_teachers gt
-                                         JOIN groups g ON g.id = gt.group_id
-                     JOIN group_memberships gm ON gm.group_id = gt.group_id
-                                         WHERE gt.teacher_id = t.id AND g.subject = 'מתמטיקה'
-                   ) AS student_count
+                   COUNT(DISTINCT gt.group_id) AS group_count,
+                   COUNT(DISTINCT gm.student_id) AS student_count
             FROM teachers t
-                        WHERE EXISTS (
-                            SELECT 1
-                            FROM group_teachers gt
-                            JOIN groups g ON g.id = gt.group_id
-                            WHERE gt.teacher_id = t.id AND g.subject = 'מתמטיקה'
-                        )
+            JOIN group_teachers gt ON gt.teacher_id = t.id
+            JOIN groups g ON g.id = gt.group_id AND g.subject = 'מתמטיקה'
+            LEFT JOIN group_memberships gm ON gm.group_id = g.id
+            GROUP BY t.id, t.name
             ORDER BY t.name
             """
         ).fetchall()
@@ -421,74 +541,95 @@ def teachers_index(request: Request):
                 teachers=teachers,
             ),
         )
-    finally:
-        conn.close()
 
 
 @app.get("/חיפוש", response_class=HTMLResponse)
 def search_page(request: Request, q: str = ""):
     q = (q or "").strip()
-    conn = connect()
-    try:
+    with get_connection() as conn:
         students = []
         teachers = []
         homerooms = []
         groups = []
 
         if q:
-            like = f"%{q}%"
-
-            students = conn.execute(
+            # One round-trip for all four result lists; `kind` tells them apart and
+            # `pos` keeps each branch's own ordering.
+            rows = conn.execute(
                 """
-                SELECT id, full_name, grade, homeroom_code
-                FROM students
-                WHERE full_name LIKE ? OR COALESCE(first_name,'') LIKE ? OR COALESCE(last_name,'') LIKE ?
-                ORDER BY COALESCE(last_name, full_name), COALESCE(first_name, '')
-                LIMIT 50
+                SELECT * FROM (
+                    SELECT 'student' AS kind,
+                           ROW_NUMBER() OVER (ORDER BY COALESCE(last_name, full_name), COALESCE(first_name, '')) AS pos,
+                           id, full_name AS name, grade, homeroom_code AS detail,
+                           NULL AS group_name, NULL AS variant, NULL AS folder,
+                           NULL AS group_count, NULL AS student_count
+                    FROM students
+                    WHERE full_name LIKE :like OR COALESCE(first_name,'') LIKE :like OR COALESCE(last_name,'') LIKE :like
+                    ORDER BY pos
+                    LIMIT 50
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT 'teacher', ROW_NUMBER() OVER (ORDER BY t.name),
+                           t.id, t.name, NULL, NULL, NULL, NULL, NULL,
+                           (SELECT COUNT(*) FROM group_teachers gt WHERE gt.teacher_id=t.id),
+                           (
+                             SELECT COUNT(DISTINCT gm.student_id)
+                             FROM group_teachers gt
+                             JOIN group_memberships gm ON gm.group_id = gt.group_id
+                             WHERE gt.teacher_id = t.id
+                           )
+                    FROM teachers t
+                    WHERE t.name LIKE :like
+                    ORDER BY 2
+                    LIMIT 50
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT 'homeroom', ROW_NUMBER() OVER (ORDER BY grade, code),
+                           code, NULL, grade, type, NULL, NULL, NULL, NULL, NULL
+                    FROM homerooms
+                    WHERE code LIKE :like OR grade LIKE :like
+                    ORDER BY 2
+                    LIMIT 30
+                )
+                UNION ALL
+                SELECT * FROM (
+                    SELECT 'group', ROW_NUMBER() OVER (ORDER BY g.grade, g.subject, g.group_name),
+                           g.id, g.subject, g.grade, NULL, g.group_name, g.variant, g.folder, NULL,
+                           (SELECT COUNT(*) FROM group_memberships gm WHERE gm.group_id=g.id)
+                    FROM groups g
+                    WHERE g.group_name LIKE :like OR COALESCE(g.variant,'') LIKE :like OR g.folder LIKE :like
+                    ORDER BY 2
+                    LIMIT 50
+                )
+                ORDER BY kind, pos
                 """,
-                (like, like, like),
+                {"like": f"%{q}%"},
             ).fetchall()
 
-            teachers = conn.execute(
-                """
-                SELECT t.id, t.name,
-                       (SELECT COUNT(*) FROM group_teachers gt WHERE gt.teacher_id=t.id) AS group_count,
-                       (
-                         SELECT COUNT(DISTINCT gm.student_id)
-                         FROM group_teachers gt
-                         JOIN group_memberships gm ON gm.group_id = gt.group_id
-                         WHERE gt.teacher_id = t.id
-                       ) AS student_count
-                FROM teachers t
-                WHERE t.name LIKE ?
-                ORDER BY t.name
-                LIMIT 50
-                """,
-                (like,),
-            ).fetchall()
-
-            homerooms = conn.execute(
-                """
-                SELECT code, grade, type
-                FROM homerooms
-                WHERE code LIKE ? OR grade LIKE ?
-                ORDER BY grade, code
-                LIMIT 30
-                """,
-                (like, like),
-            ).fetchall()
-
-            groups = conn.execute(
-                """
-                SELECT g.id, g.grade, g.subject, g.group_name, g.variant, g.folder,
-                       (SELECT COUNT(*) FROM group_memberships gm WHERE gm.group_id=g.id) AS student_count
-                FROM groups g
-                WHERE g.group_name LIKE ? OR COALESCE(g.variant,'') LIKE ? OR g.folder LIKE ?
-                ORDER BY g.grade, g.subject, g.group_name
-                LIMIT 50
-                """,
-                (like, like, like),
-            ).fetchall()
+            for r in rows:
+                kind = r["kind"]
+                if kind == "student":
+                    students.append({"id": r["id"], "full_name": r["name"], "grade": r["grade"], "homeroom_code": r["detail"]})
+                elif kind == "teacher":
+                    teachers.append(
+                        {"id": r["id"], "name": r["name"], "group_count": r["group_count"], "student_count": r["student_count"]}
+                    )
+                elif kind == "homeroom":
+                    homerooms.append({"code": r["id"], "grade": r["grade"], "type": r["detail"]})
+                else:
+                    groups.append(
+                        {
+                            "id": r["id"],
+                            "grade": r["grade"],
+                            "subject": r["name"],
+                            "group_name": r["group_name"],
+                            "variant": r["variant"],
+                            "folder": r["folder"],
+                            "student_count": r["student_count"],
+                        }
+                    )
 
         return templates.TemplateResponse(
             "search.html",
@@ -503,28 +644,32 @@ def search_page(request: Request, q: str = ""):
                 groups=groups,
             ),
         )
-    finally:
-        conn.close()
 
 
 @app.get("/מפה", response_class=HTMLResponse)
+@_cached_page
 def sitemap(request: Request):
-    conn = connect()
-    try:
+    with get_connection() as conn:
+        counts = {}
+        for row in conn.execute(
+            """
+            SELECT 'students' AS kind, grade, COUNT(*) AS c FROM students GROUP BY grade
+            UNION ALL
+            SELECT 'homerooms', grade, COUNT(*) FROM homerooms GROUP BY grade
+            UNION ALL
+            SELECT 'groups', grade, COUNT(*) FROM groups WHERE subject='מתמטיקה' GROUP BY grade
+            """
+        ):
+            counts[(row["kind"], row["grade"])] = row["c"]
+
         grades = []
         for grade in ["ז", "ח", "ט"]:
-            student_count = conn.execute("SELECT COUNT(*) AS c FROM students WHERE grade=?", (grade,)).fetchone()["c"]
-            homeroom_count = conn.execute("SELECT COUNT(*) AS c FROM homerooms WHERE grade=?", (grade,)).fetchone()["c"]
-            group_count = conn.execute(
-                "SELECT COUNT(*) AS c FROM groups WHERE grade=? AND subject='מתמטיקה'",
-                (grade,),
-            ).fetchone()["c"]
             grades.append(
                 {
                     "grade": grade,
-                    "student_count": student_count,
-                    "homeroom_count": homeroom_count,
-                    "group_count": group_count,
+                    "student_count": counts.get(("students", grade), 0),
+                    "homeroom_count": counts.get(("homerooms", grade), 0),
+                    "group_count": counts.get(("groups", grade), 0),
                 }
             )
 
@@ -540,55 +685,22 @@ def sitemap(request: Request):
                 homerooms=homerooms,
             ),
         )
-    finally:
-        conn.close()
 
 
 def _render_grade_page(request: Request, grade: str):
     if grade not in {"ז", "ח", "ט"}:
         raise HTTPException(status_code=404)
 
-    conn = connect()
-    try:
-        total = conn.execute(
-            "SELECT COUNT(*) AS c FROM students WHERE grade = ?",
-            (grade,),
-        ).fetchone()["c"]
+    with get_connection() as conn:
+        total = conn.execute(_SQL_GRADE_TOTAL, (grade,)).fetchone()["c"]
 
-        groups = conn.execute(
-            """
-            SELECT g.id, g.grade, g.subject, g.group_name, g.variant, g.folder,
-                   (SELECT COUNT(*) FROM group_memberships gm WHERE gm.group_id=g.id) AS student_count
-            FROM groups g
-            WHERE g.grade = ? AND g.subject = 'מתמטיקה'
-                        ORDER BY
-                            CASE g.group_name
-                                WHEN 'מדעית' THEN 0
-                                WHEN 'א' THEN 1
-                                WHEN 'א1' THEN 2
-                                WHEN 'מקדמת' THEN 3
-                                ELSE 9
-                            END,
-                            COALESCE(g.variant, ''),
-                            g.folder
-            """,
-            (grade,),
-        ).fetchall()
+        # teachers per group (one query for the whole grade)
+        group_teachers = defaultdict(list)
+        for t in conn.execute(_SQL_GRADE_GROUP_TEACHERS, (grade,)):
+            group_teachers[t["group_id"]].append(t)
 
-        # teachers per group
-        group_teachers = {}
-        for row in groups:
-            teachers = conn.execute(
-                """
-                SELECT t.id, t.name
-                FROM teachers t
-                JOIN group_teachers gt ON gt.teacher_id=t.id
-                WHERE gt.group_id = ?
-                ORDER BY t.name
-                """,
-                (row["id"],),
-            ).fetchall()
-            group_teachers[row["id"]] = teachers
+        # Iterated once by the template, which renders before we return.
+        groups = conn.execute(_SQL_GRADE_GROUPS, (grade,))
 
         return templates.TemplateResponse(
             "grade.html",
@@ -603,13 +715,10 @@ def _render_grade_page(request: Request, grade: str):
                 group_teachers=group_teachers,
             ),
         )
-    finally:
-        conn.close()
 
 
 def _render_group_page(request: Request, group_id: str):
-    conn = connect()
-    try:
+    with get_connection() as conn:
         group = conn.execute(
             "SELECT * FROM groups WHERE id = ?",
             (group_id,),
@@ -628,6 +737,7 @@ def _render_group_page(request: Request, group_id: str):
             (group_id,),
         ).fetchall()
 
+        # Passed to the template as a cursor; it is iterated once while rendering.
         students = conn.execute(
             """
             SELECT s.id, s.first_name, s.last_name, s.full_name, s.homeroom_code,
@@ -639,9 +749,12 @@ def _render_group_page(request: Request, group_id: str):
             ORDER BY COALESCE(s.last_name, s.full_name), COALESCE(s.first_name, '')
             """,
             (group_id,),
-        ).fetchall()
+        )
 
-        total = len(students)
+        total = conn.execute(
+            "SELECT COUNT(*) AS c FROM group_memberships WHERE group_id = ?",
+            (group_id,),
+        ).fetchone()["c"]
 
         variant_txt = f" ({group['variant']})" if group["variant"] else ""
 
@@ -662,13 +775,10 @@ def _render_group_page(request: Request, group_id: str):
                 total_students=total,
             ),
         )
-    finally:
-        conn.close()
 
 
 def _render_student_page(request: Request, student_id: str):
-    conn = connect()
-    try:
+    with get_connection() as conn:
         student = conn.execute("SELECT * FROM students WHERE id = ?", (student_id,)).fetchone()
         if not student:
             raise HTTPException(status_code=404)
@@ -686,14 +796,8 @@ def _render_student_page(request: Request, student_id: str):
             WHERE gm.student_id = ?
                         ORDER BY
                             g.subject,
-                            CASE g.group_name
-                                WHEN 'מדעית' THEN 0
-                                WHEN 'א' THEN 1
-                                WHEN 'א1' THEN 2
-                                WHEN 'מקדמת' THEN 3
-                                ELSE 9
-                            END,
-                            COALESCE(g.variant, ''),
+                            g.group_name_rank,
+                            g.variant,
                             g.folder
             """,
             (student_id,),
@@ -715,8 +819,6 @@ def _render_student_page(request: Request, student_id: str):
                 memberships=memberships,
             ),
         )
-    finally:
-        conn.close()
 
 
 @app.post("/students/{student_id}/metrics")
@@ -738,94 +840,67 @@ def update_student_metrics(
         except Exception:
             return None
 
-    conn = connect()
-    try:
-        exists = conn.execute("SELECT 1 FROM students WHERE id=?", (student_id,)).fetchone()
-        if not exists:
-            raise HTTPException(status_code=404)
-
-        # validate extra_json if provided
-        extra_blob = None
-        if (extra_json or "").strip() != "":
-            try:
-                parsed = json_loads(extra_json)
-                extra_blob = json_dumps(parsed)
-            except Exception:
-                extra_blob = json_dumps({"raw": extra_json})
+    # validate extra_json if provided
+    extra_blob = None
+    if (extra_json or "").strip() != "":
+        try:
+            parsed = json_loads(extra_json)
+            extra_blob = json_dumps(parsed)
+        except Exception:
+            extra_blob = json_dumps({"raw": extra_json})
 
-        conn.execute(
-            """
-            INSERT INTO student_metrics (student_id, math_term_grade, math_test1, math_test2, behavior_note, extra_json, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(student_id) DO UPDATE SET
-                math_term_grade=excluded.math_term_grade,
-                math_test1=excluded.math_test1,
-                math_test2=excluded.math_test2,
-                behavior_note=excluded.behavior_note,
-                extra_json=COALESCE(excluded.extra_json, student_metrics.extra_json),
-                updated_at=excluded.updated_at
-            """,
-            (
-                student_id,
-                to_float(math_term_grade),
-                to_float(math_test1),
-                to_float(math_test2),
-                (behavior_note or "").strip() or None,
-                extra_blob,
-                datetime.now().isoformat(timespec="seconds"),
-            ),
-        )
-        conn.commit()
+    # Unknown student_id fails the FK on student_metrics -> 404.
+    try:
+        with get_connection(write=True) as conn:
+            rows = conn.execute(
+                """
+                INSERT INTO student_metrics (student_id, math_term_grade, math_test1, math_test2, behavior_note, extra_json, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(student_id) DO UPDATE SET
+                    math_term_grade=excluded.math_term_grade,
+                    math_test1=excluded.math_test1,
+                    math_test2=excluded.math_test2,
+                    behavior_note=excluded.behavior_note,
+                    extra_json=COALESCE(excluded.extra_json, student_metrics.extra_json),
+                    updated_at=excluded.updated_at
+                RETURNING student_id AS id, (SELECT full_name FROM students WHERE id = student_metrics.student_id) AS full_name
+                """,
+                (
+                    student_id,
+                    to_float(math_term_grade),
+                    to_float(math_test1),
+                    to_float(math_test2),
+                    (behavior_note or "").strip() or None,
+                    extra_blob,
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            ).fetchall()
+    except sqlite3.IntegrityError:
+        raise HTTPException(status_code=404)
+    _page_cache.clear()
 
-        # Redirect to pretty student page
-        student_row = conn.execute("SELECT id, full_name FROM students WHERE id=?", (student_id,)).fetchone()
-        if student_row:
-            return RedirectResponse(url=_url_student_row(student_row), status_code=303)
-        return RedirectResponse(url="/", status_code=303)
-    finally:
-        conn.close()
+    # Redirect to pretty student page
+    if rows and rows[0]["full_name"]:
+        return RedirectResponse(url=_url_student_row(rows[0]), status_code=303)
+    return RedirectResponse(url="/", status_code=303)
 
 
 def _render_teacher_page(request: Request, teacher_id: str):
-    conn = connect()
-    try:
+    with get_connection() as conn:
         teacher = conn.execute("SELECT * FROM teachers WHERE id=?", (teacher_id,)).fetchone()
         if not teacher:
             raise HTTPException(status_code=404)
 
-        groups = conn.execute(
-            """
-            SELECT g.id, g.grade, g.subject, g.group_name, g.variant, g.folder,
-                   (SELECT COUNT(*) FROM group_memberships gm WHERE gm.group_id=g.id) AS student_count
-            FROM groups g
-            JOIN group_teachers gt ON gt.group_id=g.id
-            WHERE gt.teacher_id = ? AND g.subject = 'מתמטיקה'
-                        ORDER BY
-                            g.grade,
-                            CASE g.group_name
-                                WHEN 'מדעית' THEN 0
-                                WHEN 'א' THEN 1
-                                WHEN 'א1' THEN 2
-                                WHEN 'מקדמת' THEN 3
-                                ELSE 9
-                            END,
-                            COALESCE(g.variant, ''),
-                            g.folder
-            """,
-            (teacher_id,),
-        ).fetchall()
+        groups = conn.execute(_SQL_TEACHER_GROUPS, (teacher_id,)).fetchall()
 
         return templates.TemplateResponse(
             "teacher.html",
                 _with_common_context(request, title=f"מורה: {teacher['name']} – TALMID", teacher=teacher, groups=groups, breadcrumbs=[_crumb("בית", "/"), _crumb("מורים", "/מורים"), _crumb(teacher["name"])]),
         )
-    finally:
-        conn.close()
 
 
 def _render_homeroom_page(request: Request, code: str):
-    conn = connect()
-    try:
+    with get_connection() as conn:
         homeroom = conn.execute("SELECT * FROM homerooms WHERE code=?", (code,)).fetchone()
         if not homeroom:
             raise HTTPException(status_code=404)
@@ -841,39 +916,12 @@ def _render_homeroom_page(request: Request, code: str):
             (code,),
         ).fetchall()
 
-        students = conn.execute(
-            """
-            SELECT s.id, s.first_name, s.last_name, s.full_name
-            FROM students s
-            WHERE s.homeroom_code = ?
-            ORDER BY COALESCE(s.last_name, s.full_name), COALESCE(s.first_name, '')
-            """,
-            (code,),
-        ).fetchall()
+        students = conn.execute(_SQL_HOMEROOM_STUDENTS, (code,)).fetchall()
 
-        # for each student, list math groups
-        math_groups_by_student = {}
-        for s in students:
-            g = conn.execute(
-                """
-                SELECT g.id, g.grade, g.subject, g.group_name, g.variant, g.folder
-                FROM groups g
-                JOIN group_memberships gm ON gm.group_id=g.id
-                WHERE gm.student_id=? AND g.subject='מתמטיקה'
-                                ORDER BY
-                                    CASE g.group_name
-                                        WHEN 'מדעית' THEN 0
-                                        WHEN 'א' THEN 1
-                                        WHEN 'א1' THEN 2
-                                        WHEN 'מקדמת' THEN 3
-                                        ELSE 9
-                                    END,
-                                    COALESCE(g.variant, ''),
-                                    g.folder
-                """,
-                (s["id"],),
-            ).fetchall()
-            math_groups_by_student[s["id"]] = g
+        # math groups of every student in the homeroom, in one query
+        math_groups_by_student = defaultdict(list)
+        for g in conn.execute(_SQL_HOMEROOM_MATH_GROUPS, (code,)):
+            math_groups_by_student[g["student_id"]].append(g)
 
         return templates.TemplateResponse(
             "homeroom.html",
@@ -892,16 +940,11 @@ def _render_homeroom_page(request: Request, code: str):
                 math_groups_by_student=math_groups_by_student,
             ),
         )
-    finally:
-        conn.close()
 
 
 def _render_info_page(request: Request):
     # Render the existing auto-generated summary.
-    team_root = Path(__file__).resolve().parents[2]
-    md_path = team_root / "מידע_חשוב.md"
-    text = md_path.read_text(encoding="utf-8") if md_path.exists() else "(חסר קובץ מידע_חשוב.md)"
-    html = md.render(text)
+    html = _md_file_html(_INFO_MD, "(חסר קובץ מידע_חשוב.md)")
     return templates.TemplateResponse(
         "info.html",
         _with_common_context(
@@ -914,10 +957,7 @@ def _render_info_page(request: Request):
 
 
 def _render_updates_page(request: Request):
-    team_root = Path(__file__).resolve().parents[2]
-    md_path = team_root / "עדכונים_חשובים.md"
-    text = md_path.read_text(encoding="utf-8") if md_path.exists() else "(חסר קובץ עדכונים_חשובים.md)"
-    html = md.render(text)
+    html = _md_file_html(_UPDATES_MD, "(חסר קובץ עדכונים_חשובים.md)")
     return templates.TemplateResponse(
         "updates.html",
         _with_common_context(
@@ -945,27 +985,21 @@ def _legacy_group_redirect(group_id: str):
 @app.get("/students/{student_id}/", include_in_schema=False)
 @app.get("/students/{student_id}", include_in_schema=False)
 def _legacy_student_redirect(student_id: str):
-    conn = connect()
-    try:
+    with get_connection() as conn:
         s = conn.execute("SELECT id, full_name FROM students WHERE id=?", (student_id,)).fetchone()
         if not s:
             return RedirectResponse(url="/", status_code=307)
         return RedirectResponse(url=_url_student_row(s), status_code=307)
-    finally:
-        conn.close()
 
 
 @app.get("/teachers/{teacher_id}/", include_in_schema=False)
 @app.get("/teachers/{teacher_id}", include_in_schema=False)
 def _legacy_teacher_redirect(teacher_id: str):
-    conn = connect()
-    try:
+    with get_connection() as conn:
         t = conn.execute("SELECT id, name FROM teachers WHERE id=?", (teacher_id,)).fetchone()
         if not t:
             return RedirectResponse(url="/", status_code=307)
         return RedirectResponse(url=_url_teacher_row(t), status_code=307)
-    finally:
-        conn.close()
 
 
 @app.get("/homerooms/{code}/", include_in_schema=False)
@@ -4,32 +4,43 @@ import csv
 import hashlib
 import json
 import re
+from collections.abc import Iterator
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
-from .db import connect, migrate
+from .db import GROUP_NAME_RANK, GROUP_NAME_RANK_DEFAULT, connect, migrate
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
 
-def _team_root() -> Path:
-    # team_root/אתר/app/sync.py -> team_root
-    return Path(__file__).resolve().parents[2]
+
+# team_root/אתר/app/sync.py -> team_root
+_TEAM_ROOT = Path(__file__).resolve().parents[2]
 
 
 def _read_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    data = path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
-def _read_csv(path: Path) -> list[dict[str, str]]:
+def _read_csv(path: Path) -> Iterator[dict[str, str]]:
+    # Rows are consumed once, so stream them instead of building a list.
     if not path.exists():
-        return []
+        return
     with path.open("r", newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f)
-        return [dict(row) for row in r]
+        yield from csv.DictReader(f)
+
+
+_WS_RE = re.compile(r"\s+")
 
 
 def _norm(s: str) -> str:
-    return re.sub(r"\s+", " ", (s or "").strip())
+    return _WS_RE.sub(" ", (s or "").strip())
 
 
 def _load_excluded_full_names(team_root: Path) -> set[str]:
@@ -55,21 +66,19 @@ def _load_excluded_full_names(team_root: Path) -> set[str]:
     return excluded
 
 
+@lru_cache(maxsize=65536)
 def _slug_id(prefix: str, text: str) -> str:
-    h = hashlib.sha1(_norm(text).encode("utf-8")).hexdigest()[:16]
+    # IDs are stored (metrics, URLs), so the hash must stay sha1[:16].
+    # `text` is expected to be _norm()-ed already.
+    h = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
     return f"{prefix}_{h}"
 
 
-def _guess_full_name(first_name: str, last_name: str, full_name: str) -> str:
-    fn = _norm(first_name)
-    ln = _norm(last_name)
+def _guess_full_name(fn: str, ln: str, full_name: str) -> str:
+    # Arguments are expected to be _norm()-ed already.
     if fn and ln:
         return f"{fn} {ln}"
-    if _norm(full_name):
-        return _norm(full_name)
-    if ln:
-        return ln
-    return fn
+    return full_name or ln or fn
 
 
 def _upsert_teacher(conn, name: str) -> str:
@@ -87,24 +96,27 @@ def _upsert_teacher(conn, name: str) -> str:
 def _upsert_group(conn, g: dict) -> str:
     folder = _norm(g.get("folder", ""))
     group_id = _slug_id("g", folder)
+    group_name = _norm(g.get("group_name", ""))
     conn.execute(
         """
-        INSERT INTO groups (id, grade, subject, group_name, variant, folder)
-        VALUES (?, ?, ?, ?, ?, ?)
+        INSERT INTO groups (id, grade, subject, group_name, variant, folder, group_name_rank)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
         ON CONFLICT(id) DO UPDATE SET
             grade=excluded.grade,
             subject=excluded.subject,
             group_name=excluded.group_name,
             variant=excluded.variant,
-            folder=excluded.folder
+            folder=excluded.folder,
+            group_name_rank=excluded.group_name_rank
         """,
         (
             group_id,
             _norm(g.get("grade", "")),
             _norm(g.get("subject", "")),
-            _norm(g.get("group_name", "")),
+            group_name,
             _norm(g.get("variant", "")) or None,
             folder,
+            GROUP_NAME_RANK.get(group_name, GROUP_NAME_RANK_DEFAULT),
         ),
     )
     for t in g.get("teachers") or []:
@@ -142,25 +154,24 @@ def _upsert_homeroom(conn, c: dict) -> str:
 
 
 def _student_key(full_name: str, homeroom: str, grade: str) -> str:
-    # Deterministic ID across sync runs (so metrics persist)
-    base = f"{_norm(full_name)}|{_norm(homeroom)}|{_norm(grade)}"
+    # Deterministic ID across sync runs (so metrics persist); inputs are normalized.
+    base = f"{full_name}|{homeroom}|{grade}"
     return _slug_id("s", base)
 
 
 def _upsert_student(conn, *, full_name: str, first_name: str = "", last_name: str = "", grade: str = "", homeroom: str = "", notes: str = "", created_from: str = "", external_id: str = "") -> str:
-    full_name = _norm(full_name)
+    # Arguments are expected to be _norm()-ed already (callers normalize each row once).
     if not full_name:
         return ""
 
-    external_id = _norm(external_id)
-
     # Prefer stable external IDs when available.
     if external_id:
         existing = conn.execute(
-            "SELECT id FROM students WHERE external_id = ? LIMIT 1",
+            # The extra predicate lets sqlite use the partial unique index.
+            "SELECT id FROM students WHERE external_id = ? AND external_id != '' LIMIT 1",
             (external_id,),
         ).fetchone()
-        student_id = existing["id"] if existing else _slug_id("s", f"ext|{external_id}")
+        student_id = existing[0] if existing else _slug_id("s", f"ext|{external_id}")
     else:
         student_id = _student_key(full_name, homeroom, grade)
 
@@ -193,34 +204,36 @@ def _upsert_student(conn, *, full_name: str, first_name: str = "", last_name: st
             student_id,
             external_id or None,
             full_name,
-            _norm(first_name) or None,
-            _norm(last_name) or None,
-            _norm(grade) or None,
-            _norm(homeroom) or None,
-            _norm(notes) or None,
-            _norm(created_from) or None,
+            first_name or None,
+            last_name or None,
+            grade or None,
+            homeroom or None,
+            notes or None,
+            created_from or None,
         ),
     )
 
     return student_id
 
 
-def _add_membership(conn, group_id: str, student_id: str, source: str) -> None:
-    if not (group_id and student_id):
-        return
-    conn.execute(
-        "INSERT OR IGNORE INTO group_memberships (group_id, student_id, source) VALUES (?, ?, ?)",
-        (group_id, student_id, _norm(source) or None),
-    )
+def _add_membership(memberships: list[tuple[str, str, str]], group_id: str, student_id: str, source: str) -> None:
+    # Collected here and written with a single executemany at the end of the sync.
+    if group_id and student_id:
+        memberships.append((group_id, student_id, source))
 
 
 def main() -> int:
-    team_root = _team_root()
+    team_root = _TEAM_ROOT
 
     excluded_names = _load_excluded_full_names(team_root)
 
     conn = connect()
     migrate(conn)
+    # Plain tuples are enough here; sqlite3.Row is only needed by the templates.
+    conn.row_factory = None
+
+    # Take the write lock up front; the whole import is one transaction.
+    conn.execute("BEGIN IMMEDIATE")
 
     # Clean memberships each sync, but keep students + metrics stable.
     conn.execute("DELETE FROM group_memberships")
@@ -229,6 +242,7 @@ def main() -> int:
     homerooms_data = _read_json(team_root / "נתונים" / "כיתות_אם.json")
 
     folder_to_group_id: dict[str, str] = {}
+    memberships: list[tuple[str, str, str]] = []
 
     for g in groups_data.get("groups") or []:
         gid = _upsert_group(conn, g)
@@ -237,22 +251,23 @@ def main() -> int:
     for c in homerooms_data.get("classes") or []:
         _upsert_homeroom(conn, c)
 
-    # Import group rosters from Excel-generated CSVs
-    roster_files = list((team_root / "הקבצות").rglob("תלמידים_מהאקסל__*.csv"))
-    for path in roster_files:
-        # group folder is relative from team_root
-        rel_folder = str(path.parent.relative_to(team_root)).replace("\\", "/")
-        group_id = folder_to_group_id.get(rel_folder)
-        if not group_id:
-            continue
-
+    # Import group rosters from Excel-generated CSVs.
+    # Rosters sit directly in their group folder, so only the known folders are listed.
+    roster_files = [
+        (path, group_id)
+        for rel_folder, group_id in folder_to_group_id.items()
+        if rel_folder
+        for path in sorted((team_root / rel_folder).glob("תלמידים_מהאקסל__*.csv"))
+    ]
+    for path, group_id in roster_files:
+        created_from = _norm(f"excel:{path.name}")
         for row in _read_csv(path):
             external_id = _norm(row.get("student_id", ""))
-            first_name = row.get("first_name", "")
-            last_name = row.get("last_name", "")
-            full_name = _guess_full_name(first_name, last_name, row.get("full_name", ""))
+            first_name = _norm(row.get("first_name", ""))
+            last_name = _norm(row.get("last_name", ""))
+            full_name = _guess_full_name(first_name, last_name, _norm(row.get("full_name", "")))
 
-            if full_name and _norm(full_name) in excluded_names:
+            if full_name and full_name in excluded_names:
                 continue
             homeroom = _norm(row.get("homeroom_class", ""))
             grade = homeroom[:1] if homeroom else ""
@@ -266,12 +281,19 @@ def main() -> int:
                 grade=grade,
                 homeroom=homeroom,
                 notes=notes,
-                created_from=f"excel:{path.name}",
+                created_from=created_from,
                 external_id=external_id,
             )
-            _add_membership(conn, group_id, sid, source="excel")
+            _add_membership(memberships, group_id, sid, "excel")
 
     # Import manual/exceptions students: נתונים/תלמידים.csv
+    # pick unique group by grade+name. If multiple variants exist, keep the first match.
+    math_groups_by_key: dict[tuple[str, str], dict] = {}
+    for g in groups_data.get("groups") or []:
+        if _norm(g.get("subject", "")) != "מתמטיקה":
+            continue
+        math_groups_by_key.setdefault((_norm(g.get("grade", "")), _norm(g.get("group_name", ""))), g)
+
     for row in _read_csv(team_root / "נתונים" / "תלמידים.csv"):
         external_id = _norm(row.get("student_id", ""))
         full_name = _norm(row.get("full_name", ""))
@@ -286,14 +308,7 @@ def main() -> int:
         if full_name in excluded_names:
             continue
 
-        # pick unique group by grade+name. If multiple variants exist, keep the first match.
-        candidate = None
-        for g in groups_data.get("groups") or []:
-            if _norm(g.get("subject", "")) != "מתמטיקה":
-                continue
-            if _norm(g.get("grade", "")) == grade and _norm(g.get("group_name", "")) == math_group:
-                candidate = g
-                break
+        candidate = math_groups_by_key.get((grade, math_group))
 
         sid = _upsert_student(
             conn,
@@ -308,7 +323,12 @@ def main() -> int:
         if candidate:
             group_id = folder_to_group_id.get(_norm(candidate.get("folder", "")))
             if group_id:
-                _add_membership(conn, group_id, sid, source="manual")
+                _add_membership(memberships, group_id, sid, "manual")
+
+    conn.executemany(
+        "INSERT OR IGNORE INTO group_memberships (group_id, student_id, source) VALUES (?, ?, ?)",
+        memberships,
+    )
 
     # Write sync metadata
     conn.execute(
@@ -320,23 +340,30 @@ def main() -> int:
 
     # Hard-delete excluded students so they never appear in the app.
     # We delete by normalized full_name (names list is small and explicit).
-    for name in sorted(excluded_names):
-        if not name:
-            continue
-        rows = conn.execute("SELECT id FROM students WHERE full_name = ?", (name,)).fetchall()
-        for r in rows:
-            sid = r["id"]
-            # Metrics + memberships are configured with ON DELETE CASCADE,
-            # but delete metrics explicitly for older DBs / safety.
-            conn.execute("DELETE FROM student_metrics WHERE student_id = ?", (sid,))
-            conn.execute("DELETE FROM students WHERE id = ?", (sid,))
+    conn.execute("CREATE TEMP TABLE _excluded_names (name TEXT PRIMARY KEY)")
+    conn.executemany(
+        "INSERT OR IGNORE INTO _excluded_names (name) VALUES (?)",
+        [(name,) for name in excluded_names if name],
+    )
+    # Metrics + memberships are configured with ON DELETE CASCADE,
+    # but delete metrics explicitly for older DBs / safety.
+    conn.execute(
+        """
+        DELETE FROM student_metrics
+        WHERE student_id IN (
+            SELECT id FROM students WHERE full_name IN (SELECT name FROM _excluded_names)
+        )
+        """
+    )
+    conn.execute("DELETE FROM students WHERE full_name IN (SELECT name FROM _excluded_names)")
+    conn.execute("DROP TABLE _excluded_names")
 
     conn.commit()
 
     # Basic stats
-    total_students = conn.execute("SELECT COUNT(*) AS c FROM students").fetchone()["c"]
-    total_groups = conn.execute("SELECT COUNT(*) AS c FROM groups").fetchone()["c"]
-    total_teachers = conn.execute("SELECT COUNT(*) AS c FROM teachers").fetchone()["c"]
+    total_students = conn.execute("SELECT COUNT(*) AS c FROM students").fetchone()[0]
+    total_groups = conn.execute("SELECT COUNT(*) AS c FROM groups").fetchone()[0]
+    total_teachers = conn.execute("SELECT COUNT(*) AS c FROM teachers").fetchone()[0]
 
     print(f"Sync OK. students={total_students}, groups={total_groups}, teachers={total_teachers}")
     return 0
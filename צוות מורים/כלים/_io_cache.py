@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
+
+@lru_cache(maxsize=32)
+def _load_json(path_str: str, mtime_ns: int) -> dict:
+    data = Path(path_str).read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def read_json_cached(path: Path) -> dict:
+    # Parsed once per (path, mtime) per process; a rewritten file is parsed again.
+    # The returned object is shared between callers, so treat it as read-only.
+    return _load_json(str(path), path.stat().st_mtime_ns)
+
+
+def _source_key(source: Path) -> str:
+    st = source.stat()
+    return f"{st.st_mtime_ns}-{st.st_size}"
+
+
+def read_derived_cache(cache_path: Path, source: Path) -> Any | None:
+    # Data derived from `source` and saved by write_derived_cache; None when missing,
+    # unreadable or saved for a different version (mtime/size) of the source file.
+    try:
+        data = cache_path.read_bytes()
+        cached = orjson.loads(data) if orjson is not None else json.loads(data)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("key") != _source_key(source):
+        return None
+    return cached.get("data")
+
+
+def write_derived_cache(cache_path: Path, source: Path, data: Any) -> None:
+    payload = {"key": _source_key(source), "data": data}
+    try:
+        cache_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+    except OSError:
+        pass  # the cache is an optimization; a read-only checkout still works without it
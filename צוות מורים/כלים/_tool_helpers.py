@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from pathlib import Path
+
+
+@lru_cache(maxsize=None)
+def ensure_dir(path: Path) -> None:
+    # Several output files share a folder; create each folder once per run.
+    path.mkdir(parents=True, exist_ok=True)
+
+
+# Header keywords, matched in one scan. The lookahead reports overlapping hits too,
+# so the set of matches equals the set of keywords found by `k in text`.
+_HEADER_KEYWORDS_RE = re.compile(r"(?=(שם|משפחה|פרטי|תלמיד|כיתה|תז|ת\.ז|תעודת|זהות))")
+
+
+def has_two_header_keywords(text: str) -> bool:
+    # Stops at the second distinct keyword instead of collecting every match.
+    first = None
+    for m in _HEADER_KEYWORDS_RE.finditer(text):
+        if first is None:
+            first = m.group(1)
+        elif m.group(1) != first:
+            return True
+    return False
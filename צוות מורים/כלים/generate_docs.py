@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from _io_cache import read_json_cached
+from generate_summary import write_summary
+from generate_updates import write_updates
+
+
+def main() -> int:
+    # Writes מידע_חשוב.md and עדכונים_חשובים.md in one process: the groups/homerooms
+    # JSON is parsed once and shared by both documents.
+    team_root = Path(__file__).resolve().parents[1]
+
+    groups = read_json_cached(team_root / "נתונים" / "הקבצות.json").get("groups") or []
+    homerooms = read_json_cached(team_root / "נתונים" / "כיתות_אם.json").get("classes") or []
+
+    write_summary(team_root, groups, homerooms)
+    write_updates(team_root, groups, homerooms)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
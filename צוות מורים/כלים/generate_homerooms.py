@@ -1,18 +1,21 @@
-import json
 from pathlib import Path
 
-AUTO_START = "<!-- AUTO:START -->"
-AUTO_END = "<!-- AUTO:END -->"
+from _io_cache import read_json_cached
 
+TEAM_ROOT = Path(__file__).resolve().parents[1]
 
-def _read_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as file:
-        return json.load(file)
+AUTO_START = "<!-- AUTO:START -->"
+AUTO_END = "<!-- AUTO:END -->"
 
 
 def _write_text(path: Path, content: str) -> None:
+    # Encode once, compare bytes and write the same buffer. Leave identical files
+    # untouched so their mtime (and the site's cache) stays valid.
+    data = content.encode("utf-8")
+    if path.is_file() and path.read_bytes() == data:
+        return
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
+    path.write_bytes(data)
 
 
 def _merge_auto_section(existing: str | None, auto_block: str) -> str:
@@ -57,10 +60,10 @@ def _format_readme(entry: dict) -> str:
 
 
 def main() -> int:
-    repo_root = Path(__file__).resolve().parents[1]
+    repo_root = TEAM_ROOT
     data_path = repo_root / "נתונים" / "כיתות_אם.json"
 
-    data = _read_json(data_path)
+    data = read_json_cached(data_path)
     classes = data.get("classes") or []
 
     index_lines = [
@@ -83,7 +86,10 @@ def main() -> int:
         if readme_path.exists():
             existing = readme_path.read_text(encoding="utf-8")
 
-        _write_text(readme_path, _merge_auto_section(existing, _format_readme(entry)))
+        merged = _merge_auto_section(existing, _format_readme(entry))
+        # existing was just read; compare here instead of letting _write_text re-read it.
+        if merged != existing:
+            _write_text(readme_path, merged)
 
         class_type = entry.get("type", "")
         teachers = ", ".join(entry.get("homeroom_teachers") or [])
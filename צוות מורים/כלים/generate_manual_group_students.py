@@ -1,14 +1,11 @@
 from __future__ import annotations
 
 import csv
-import json
 from collections import defaultdict
+from collections.abc import Iterator
 from pathlib import Path
 
-
-def _read_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+from _io_cache import read_json_cached
 
 
 def _write_csv(path: Path, rows: list[dict[str, str]], fieldnames: list[str]) -> None:
@@ -20,18 +17,18 @@ def _write_csv(path: Path, rows: list[dict[str, str]], fieldnames: list[str]) ->
             w.writerow({k: r.get(k, "") for k in fieldnames})
 
 
-def _read_students_csv(path: Path) -> list[dict[str, str]]:
+def _read_students_csv(path: Path) -> Iterator[dict[str, str]]:
+    # Rows are consumed once, so stream them instead of building a list.
     if not path.exists():
-        return []
+        return
     with path.open("r", newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f)
-        return [dict(row) for row in r]
+        yield from csv.DictReader(f)
 
 
 def main() -> int:
     team_root = Path(__file__).resolve().parents[1]
 
-    groups = _read_json(team_root / "נתונים" / "הקבצות.json").get("groups") or []
+    groups = read_json_cached(team_root / "נתונים" / "הקבצות.json").get("groups") or []
 
     # Map (grade, group_name) -> list of group entries (may have multiple variants)
     by_grade_group: dict[tuple[str, str], list[dict]] = defaultdict(list)
@@ -1,22 +1,20 @@
-import json
 from collections import defaultdict
 from pathlib import Path
 
+from _io_cache import read_json_cached
 
-def _read_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as file:
-        return json.load(file)
+TEAM_ROOT = Path(__file__).resolve().parents[1]
 
 
 def _write_text(path: Path, content: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
+    path.write_bytes(content.encode("utf-8"))
 
 
 def main() -> int:
-    root = Path(__file__).resolve().parents[1]
+    root = TEAM_ROOT
     groups_path = root / "נתונים" / "הקבצות.json"
-    groups_data = _read_json(groups_path)
+    groups_data = read_json_cached(groups_path)
 
     by_teacher: dict[str, list[dict]] = defaultdict(list)
     for entry in (groups_data.get("groups") or []):
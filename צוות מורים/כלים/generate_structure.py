@@ -1,19 +1,27 @@
-import json
+from __future__ import annotations
+
+import io
 import os
+import re
 from pathlib import Path
 
-AUTO_START = "<!-- AUTO:START -->"
-AUTO_END = "<!-- AUTO:END -->"
+from _io_cache import read_json_cached
+from _tool_helpers import ensure_dir
 
+TEAM_ROOT = Path(__file__).resolve().parents[1]
 
-def _read_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as file:
-        return json.load(file)
+AUTO_START = "<!-- AUTO:START -->"
+AUTO_END = "<!-- AUTO:END -->"
 
 
 def _write_text(path: Path, content: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
+    # Encode once, compare bytes and write the same buffer. Leave identical files
+    # untouched so their mtime (and the site's cache) stays valid.
+    data = content.encode("utf-8")
+    if path.is_file() and path.read_bytes() == data:
+        return
+    ensure_dir(path.parent)
+    path.write_bytes(data)
 
 
 def _merge_auto_section(existing: str | None, auto_block: str) -> str:
@@ -59,61 +67,49 @@ def _format_readme(entry: dict) -> str:
     return "\n".join(lines) + "\n"
 
 
+# Runs of anything but letters/digits (underscore included) become a single "_".
+_UNSAFE_FILENAME_RE = re.compile(r"[\W_]+")
+
+
 def _safe_filename_part(text: str) -> str:
-    cleaned = []
-    for ch in str(text or "").strip():
-        if ch.isalnum() or ch in ["א", "ב", "ג", "ד", "ה", "ו", "ז", "ח", "ט", "י", "כ", "ל", "מ", "נ", "ס", "ע", "פ", "צ", "ק", "ר", "ש", "ת"]:
-            cleaned.append(ch)
-        else:
-            cleaned.append("_")
-    out = "".join(cleaned)
-    while "__" in out:
-        out = out.replace("__", "_")
+    out = _UNSAFE_FILENAME_RE.sub("_", str(text or "").strip())
     return out.strip("_") or "file"
 
 
-def _group_page_filename(entry: dict) -> str:
-    grade = _safe_filename_part(entry.get("grade", ""))
-    group_name = _safe_filename_part(entry.get("group_name", ""))
-    variant = _safe_filename_part(entry.get("variant", "")) if entry.get("variant") else ""
-    subject = _safe_filename_part(entry.get("subject", ""))
+def _group_page_filename(grade: str, subject: str, group_name: str, variant: str | None) -> str:
+    grade = _safe_filename_part(grade)
+    group_name = _safe_filename_part(group_name)
+    variant = _safe_filename_part(variant) if variant else ""
+    subject = _safe_filename_part(subject)
 
     parts = [p for p in ["הקבצה", grade, subject, group_name, variant] if p]
     return "_".join(parts) + ".md"
 
 
-def _format_group_page(entry: dict) -> str:
-    teachers = entry.get("teachers") or []
-    teachers_line = ", ".join(teachers) if teachers else ""
-    grade = entry.get("grade", "")
-    subject = entry.get("subject", "")
-    group_name = entry.get("group_name", "")
-    variant = entry.get("variant")
-    class_hint = entry.get("class_hint")
-
+def _format_group_page(
+    grade: str, subject: str, group_name: str, variant: str | None, teachers_line: str, class_hint: str | None
+) -> str:
     title = f"הקבצה {group_name}{f' ({variant})' if variant else ''} – שכבה {grade} ({subject})".strip()
-    lines = [
-        f"# {title}",
-        "",
-        f"מורה מלמד/ת: {teachers_line}",
-    ]
+    buf = io.StringIO()
+    w = buf.write
+    w(f"# {title}\n")
+    w("\n")
+    w(f"מורה מלמד/ת: {teachers_line}\n")
     if class_hint:
-        lines.append(f"כיתה קשורה/רמז: {class_hint}")
-    lines += [
-        "",
-        "קבצים בתיקייה זו:",
-        "- README.md – סיכום קצר (אוטומטי + הערות ידניות)",
-        "- תלמידים_מהאקסל__*.csv – רשימות תלמידים לפי גיליונות האקסל (כל גיליון = קבוצת לימוד נפרדת)",
-        "",
-    ]
-    return "\n".join(lines) + "\n"
+        w(f"כיתה קשורה/רמז: {class_hint}\n")
+    w("\n")
+    w("קבצים בתיקייה זו:\n")
+    w("- README.md – סיכום קצר (אוטומטי + הערות ידניות)\n")
+    w("- תלמידים_מהאקסל__*.csv – רשימות תלמידים לפי גיליונות האקסל (כל גיליון = קבוצת לימוד נפרדת)\n")
+    w("\n")
+    return buf.getvalue()
 
 
 def main() -> int:
-    repo_root = Path(__file__).resolve().parents[1]
+    repo_root = TEAM_ROOT
     data_path = repo_root / "נתונים" / "הקבצות.json"
 
-    data = _read_json(data_path)
+    data = read_json_cached(data_path)
     groups = data.get("groups") or []
 
     index_lines = [
@@ -133,16 +129,20 @@ def main() -> int:
         existing = None
         if readme_path.exists():
             existing = readme_path.read_text(encoding="utf-8")
-        _write_text(readme_path, _merge_auto_section(existing, _format_readme(entry)))
-
-        page_path = folder_path / _group_page_filename(entry)
-        _write_text(page_path, _format_group_page(entry))
+        merged = _merge_auto_section(existing, _format_readme(entry))
+        # existing was just read; compare here instead of letting _write_text re-read it.
+        if merged != existing:
+            _write_text(readme_path, merged)
 
         grade = entry.get("grade", "")
         subject = entry.get("subject", "")
         group_name = entry.get("group_name", "")
         variant = entry.get("variant")
         teachers = ", ".join(entry.get("teachers") or [])
+
+        page_path = folder_path / _group_page_filename(grade, subject, group_name, variant)
+        _write_text(page_path, _format_group_page(grade, subject, group_name, variant, teachers, entry.get("class_hint")))
+
         label = f"{grade} | {subject} | {group_name}{f' ({variant})' if variant else ''} | {teachers}".strip(" |")
 
         rel = folder.replace("\\", "/") + "/README.md"
@@ -1,95 +1,103 @@
 from __future__ import annotations
 
-import json
+import io
 from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
 
-
-def _read_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+from _io_cache import read_json_cached
 
 
 def _write_text(path: Path, content: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
-
-
-def main() -> int:
-    team_root = Path(__file__).resolve().parents[1]
+    path.write_bytes(content.encode("utf-8"))
 
-    groups = _read_json(team_root / "נתונים" / "הקבצות.json").get("groups") or []
-    homerooms = _read_json(team_root / "נתונים" / "כיתות_אם.json").get("classes") or []
 
+def build_summary(groups: list[dict], homerooms: list[dict]) -> str:
     # Rules / constraints
     allowed_group_names = sorted({g.get("group_name") for g in groups if g.get("group_name")})
 
     homerooms_by_grade: dict[str, list[dict]] = defaultdict(list)
     for c in homerooms:
         homerooms_by_grade[c.get("grade", "?")].append(c)
+    groups_by_grade: dict[str, list[dict]] = defaultdict(list)
+    for g in groups:
+        groups_by_grade[g.get("grade", "?")].append(g)
+
+    # Sorted once here; several sections below walk the same order.
+    homerooms_sorted = {
+        grade: sorted(homerooms_by_grade[grade], key=lambda x: x.get("homeroom_class", ""))
+        for grade in sorted(homerooms_by_grade)
+    }
+    groups_sorted = {
+        grade: sorted(
+            groups_by_grade[grade],
+            key=lambda x: (x.get("group_name", ""), x.get("variant", ""), x.get("folder", "")),
+        )
+        for grade in sorted(groups_by_grade)
+    }
 
     last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    lines: list[str] = []
-    lines.append("# כללים חשובים (מקור מסונכרן)")
-    lines.append("")
-    lines.append(f"עודכן לאחרונה: **{last_updated}**")
-    lines.append("")
-    lines.append(
+    buf = io.StringIO()
+    w = buf.write
+    w(
+        "# כללים חשובים (מקור מסונכרן)\n"
+        "\n"
+    )
+    w(f"עודכן לאחרונה: **{last_updated}**\n")
+    w("\n")
+    w(
         "מסמך זה נוצר אוטומטית מתוך תיקיית `נתונים/` ומרכז את הכללים, ההגדרות והאילוצים של הפרויקט. "
-        "לא עורכים ידנית — משנים את המקור (`נתונים/` או קבצי הקבצות/כיתות אם) ומריצים ריענון."
+        "לא עורכים ידנית — משנים את המקור (`נתונים/` או קבצי הקבצות/כיתות אם) ומריצים ריענון.\n"
+    )
+    w("\n")
+
+    w(
+        "## מושגים (שפה אחידה)\n"
+        "- **כיתת אם**: כיתה מנהלית (למשל ח3).\n"
+        "- **הקבצה**: קבוצת לימוד במקצוע (כאן: מתמטיקה) — לא זהה לכיתת אם.\n"
+        "- **קבוצת אקסל**: כל גיליון/קובץ באקסל הוא קבוצת לימוד נפרדת ונשמר כ-CSV בתיקיית ההקבצה.\n"
+        "\n"
     )
-    lines.append("")
-
-    lines.append("## מושגים (שפה אחידה)")
-    lines.append("- **כיתת אם**: כיתה מנהלית (למשל ח3).")
-    lines.append("- **הקבצה**: קבוצת לימוד במקצוע (כאן: מתמטיקה) — לא זהה לכיתת אם.")
-    lines.append("- **קבוצת אקסל**: כל גיליון/קובץ באקסל הוא קבוצת לימוד נפרדת ונשמר כ-CSV בתיקיית ההקבצה.")
-    lines.append("")
 
-    lines.append("## עקרונות עבודה")
-    lines.append("- מקור האמת הוא `נתונים/` (JSON/CSV).")
-    lines.append("- מסד הנתונים באתר (SQLite) מסתנכרן מהנתונים — **אבל מדדים/ציונים נשמרים ב-SQLite ולא נדרסים בסנכרון**.")
-    lines.append("- לכל תלמיד יש שיוך ל: כיתת אם + הקבצה במתמטיקה.")
-    lines.append("")
+    w(
+        "## עקרונות עבודה\n"
+        "- מקור האמת הוא `נתונים/` (JSON/CSV).\n"
+        "- מסד הנתונים באתר (SQLite) מסתנכרן מהנתונים — **אבל מדדים/ציונים נשמרים ב-SQLite ולא נדרסים בסנכרון**.\n"
+        "- לכל תלמיד יש שיוך ל: כיתת אם + הקבצה במתמטיקה.\n"
+        "\n"
+    )
 
-    lines.append("## הקבצות במתמטיקה")
+    w("## הקבצות במתמטיקה\n")
     if allowed_group_names:
-        lines.append(f"- שמות הקבצות מותרים (כפי שמוגדר בנתונים): {', '.join(allowed_group_names)}")
-    lines.append("- מבנה תיקיות ההקבצות: `הקבצות/<שכבה>/<מקצוע>/<הקבצה>`")
-    lines.append("- דף הקבצה בכל תיקייה: `הקבצה_<שכבה>_<מקצוע>_<הקבצה>*.md`")
-    lines.append("")
-
-    lines.append("## כיתות אם ומחנכים")
-    for grade in sorted(homerooms_by_grade.keys()):
-        classes = sorted(homerooms_by_grade[grade], key=lambda x: x.get("homeroom_class", ""))
+        w(f"- שמות הקבצות מותרים (כפי שמוגדר בנתונים): {', '.join(allowed_group_names)}\n")
+    w(
+        "- מבנה תיקיות ההקבצות: `הקבצות/<שכבה>/<מקצוע>/<הקבצה>`\n"
+        "- דף הקבצה בכל תיקייה: `הקבצה_<שכבה>_<מקצוע>_<הקבצה>*.md`\n"
+        "\n"
+    )
+
+    w("## כיתות אם ומחנכים\n")
+    for grade, classes in homerooms_sorted.items():
         class_codes = [c.get("homeroom_class", "") for c in classes if c.get("homeroom_class")]
         if class_codes:
-            lines.append(f"- שכבה {grade}: {', '.join(class_codes)}")
-    lines.append("")
+            w(f"- שכבה {grade}: {', '.join(class_codes)}\n")
+    w("\n")
 
-    lines.append("### מחנכים לפי כיתה")
-    for grade in sorted(homerooms_by_grade.keys()):
-        classes = sorted(homerooms_by_grade[grade], key=lambda x: x.get("homeroom_class", ""))
+    w("### מחנכים לפי כיתה\n")
+    for classes in homerooms_sorted.values():
         for c in classes:
             code = c.get("homeroom_class", "")
             teachers = ", ".join(c.get("homeroom_teachers") or [])
             if code and teachers:
-                lines.append(f"- {code}: {teachers}")
-    lines.append("")
+                w(f"- {code}: {teachers}\n")
+    w("\n")
 
-    lines.append("## מורים להקבצות (מתמטיקה)")
-    groups_by_grade: dict[str, list[dict]] = defaultdict(list)
-    for g in groups:
-        groups_by_grade[g.get("grade", "?")].append(g)
-
-    for grade in sorted(groups_by_grade.keys()):
-        lines.append(f"### שכבת {grade}")
-        for g in sorted(
-            groups_by_grade[grade],
-            key=lambda x: (x.get("group_name", ""), x.get("variant", ""), x.get("folder", "")),
-        ):
+    w("## מורים להקבצות (מתמטיקה)\n")
+    for grade, grade_groups in groups_sorted.items():
+        w(f"### שכבת {grade}\n")
+        for g in grade_groups:
             group_name = g.get("group_name", "")
             if not group_name:
                 continue
@@ -98,56 +106,77 @@ def main() -> int:
             if not teachers:
                 continue
             group_label = f"{group_name}{f' ({variant})' if variant else ''}".strip()
-            lines.append(f"- {group_label}: {teachers}")
-        lines.append("")
-
-    lines.append("## קבצים וקישורים חשובים")
-    lines.append("- נתונים (מקור אמת): `נתונים/הקבצות.json`, `נתונים/כיתות_אם.json`, `נתונים/excel_mapping.json`")
-    lines.append("- אינדקס הקבצות: `הקבצות/INDEX.md`")
-    lines.append("- אינדקס כיתות אם: `כיתות_אם/INDEX.md`")
-    lines.append("- סיכום יבוא אקסל: `דוחות/סיכום_יבוא_אקסל.md`")
-    lines.append("- עדכונים חשובים (נוצר אוטומטית): `עדכונים_חשובים.md`")
-    lines.append("")
-
-    lines.append("## אתר (FastAPI + SQLite) – תפעול")
-    lines.append("- האתר נמצא ב: `אתר/`")
-    lines.append("- מסד נתונים מקומי: `אתר/data/talmid.db` (נשמר מקומית ומוחרג מ-git)")
-    lines.append("- סנכרון ל-DB: `python -m app.sync` (מתוך `אתר/`) או משימת VS Code: `TALMID: Sync DB`")
-    lines.append("- הרצה בלייב: `uvicorn app.main:app --reload --port 8000` ואז לפתוח: http://127.0.0.1:8000")
-    lines.append("")
-
-    lines.append("## תהליך עבודה מומלץ (אוטומציה)")
-    lines.append("1. ריענון נתונים מלא: `./refresh_data.ps1`")
-    lines.append("2. סנכרון מסד נתונים: `TALMID: Sync DB`")
-    lines.append("3. הרצת אתר: `TALMID: Run Web (reload)`")
-    lines.append("")
-
-    lines.append("## חריגים / תלמידים ידניים")
-    lines.append("כאשר תלמיד לא מגיע מאקסל או צריך שיוך מיוחד (שילוב/חריג) — מזינים אותו ידנית ב-`נתונים/תלמידים.csv`.")
-    lines.append("")
-    lines.append("### קובץ מקור")
-    lines.append("- `נתונים/תלמידים.csv`")
-    lines.append("")
-    lines.append("### עמודות (מינימום מומלץ)")
-    lines.append("- `full_name` – חובה")
-    lines.append("- `grade` – חובה (ז/ח/ט)")
-    lines.append("- `math_group` – חובה (שם הקבצה כפי שמופיע בנתונים, למשל: א / א1 / מדעית / מקדמת)")
-    lines.append("- `homeroom_class` – מומלץ (למשל ז3)")
-    lines.append("- `notes` – מומלץ (טקסט חופשי לתיעוד החריג)")
-    lines.append("")
-    lines.append("### איך השיוך עובד")
-    lines.append("- הסקריפט `כלים/generate_manual_group_students.py` ממפה `grade + math_group` לקובץ יעד בתוך תיקיית ההקבצה.")
-    lines.append("- התוצר נכתב לכל הקבצה כקובץ: `הקבצות/**/תלמידים_ידני.csv`.")
-    lines.append("- אם קיימות כמה קבוצות לאותו שם הקבצה באותה שכבה (למשל וריאנטים שונים) — זה יופיע כ'צריך החלטה' בדוח החריגים.")
-    lines.append("- דוח סיכום חריגים נכתב ל: `דוחות/שילובים_וחריגים.md`.")
-    lines.append("")
-    lines.append("### אחרי שינוי (מה עושים בפועל)")
-    lines.append("1. להריץ ריענון: `./refresh_data.ps1` (מייצר `תלמידים_ידני.csv` + מעדכן דוחות)")
-    lines.append("2. לסנכרן למסד הנתונים: `TALMID: Sync DB`")
-    lines.append("3. לרענן דפדפן באתר")
-    lines.append("")
-
-    _write_text(team_root / "מידע_חשוב.md", "\n".join(lines) + "\n")
+            w(f"- {group_label}: {teachers}\n")
+        w("\n")
+
+    w(
+        "## קבצים וקישורים חשובים\n"
+        "- נתונים (מקור אמת): `נתונים/הקבצות.json`, `נתונים/כיתות_אם.json`, `נתונים/excel_mapping.json`\n"
+        "- אינדקס הקבצות: `הקבצות/INDEX.md`\n"
+        "- אינדקס כיתות אם: `כיתות_אם/INDEX.md`\n"
+        "- סיכום יבוא אקסל: `דוחות/סיכום_יבוא_אקסל.md`\n"
+        "- עדכונים חשובים (נוצר אוטומטית): `עדכונים_חשובים.md`\n"
+        "\n"
+    )
+
+    w(
+        "## אתר (FastAPI + SQLite) – תפעול\n"
+        "- האתר נמצא ב: `אתר/`\n"
+        "- מסד נתונים מקומי: `אתר/data/talmid.db` (נשמר מקומית ומוחרג מ-git)\n"
+        "- סנכרון ל-DB: `python -m app.sync` (מתוך `אתר/`) או משימת VS Code: `TALMID: Sync DB`\n"
+        "- הרצה בלייב: `uvicorn app.main:app --reload --port 8000` ואז לפתוח: http://127.0.0.1:8000\n"
+        "\n"
+    )
+
+    w(
+        "## תהליך עבודה מומלץ (אוטומציה)\n"
+        "1. ריענון נתונים מלא: `./refresh_data.ps1`\n"
+        "2. סנכרון מסד נתונים: `TALMID: Sync DB`\n"
+        "3. הרצת אתר: `TALMID: Run Web (reload)`\n"
+        "\n"
+    )
+
+    w(
+        "## חריגים / תלמידים ידניים\n"
+        "כאשר תלמיד לא מגיע מאקסל או צריך שיוך מיוחד (שילוב/חריג) — מזינים אותו ידנית ב-`נתונים/תלמידים.csv`.\n"
+        "\n"
+        "### קובץ מקור\n"
+        "- `נתונים/תלמידים.csv`\n"
+        "\n"
+        "### עמודות (מינימום מומלץ)\n"
+        "- `full_name` – חובה\n"
+        "- `grade` – חובה (ז/ח/ט)\n"
+        "- `math_group` – חובה (שם הקבצה כפי שמופיע בנתונים, למשל: א / א1 / מדעית / מקדמת)\n"
+        "- `homeroom_class` – מומלץ (למשל ז3)\n"
+        "- `notes` – מומלץ (טקסט חופשי לתיעוד החריג)\n"
+        "\n"
+        "### איך השיוך עובד\n"
+        "- הסקריפט `כלים/generate_manual_group_students.py` ממפה `grade + math_group` לקובץ יעד בתוך תיקיית ההקבצה.\n"
+        "- התוצר נכתב לכל הקבצה כקובץ: `הקבצות/**/תלמידים_ידני.csv`.\n"
+        "- אם קיימות כמה קבוצות לאותו שם הקבצה באותה שכבה (למשל וריאנטים שונים) — זה יופיע כ'צריך החלטה' בדוח החריגים.\n"
+        "- דוח סיכום חריגים נכתב ל: `דוחות/שילובים_וחריגים.md`.\n"
+        "\n"
+        "### אחרי שינוי (מה עושים בפועל)\n"
+        "1. להריץ ריענון: `./refresh_data.ps1` (מייצר `תלמידים_ידני.csv` + מעדכן דוחות)\n"
+        "2. לסנכרן למסד הנתונים: `TALMID: Sync DB`\n"
+        "3. לרענן דפדפן באתר\n"
+        "\n"
+    )
+
+    return buf.getvalue()
+
+
+def write_summary(team_root: Path, groups: list[dict], homerooms: list[dict]) -> None:
+    _write_text(team_root / "מידע_חשוב.md", build_summary(groups, homerooms))
+
+
+def main() -> int:
+    team_root = Path(__file__).resolve().parents[1]
+
+    groups = read_json_cached(team_root / "נתונים" / "הקבצות.json").get("groups") or []
+    homerooms = read_json_cached(team_root / "נתונים" / "כיתות_אם.json").get("classes") or []
+
+    write_summary(team_root, groups, homerooms)
     return 0
 
 
@@ -1,14 +1,11 @@
 from __future__ import annotations
 
 import csv
-import json
+import io
 from datetime import datetime
 from pathlib import Path
 
-
-def _read_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+from _io_cache import read_json_cached
 
 
 def _read_text(path: Path) -> str:
@@ -19,16 +16,15 @@ def _read_text(path: Path) -> str:
 
 def _strip_leading_h1(md: str) -> str:
     s = (md or "").strip()
-    if not s:
+    # remove a single leading H1 ("# ...") to avoid duplicate headings in the output;
+    # slice past its line instead of splitting the whole document into lines.
+    # A blank line after the H1 is dropped by the final strip().
+    if not s.startswith("# "):
+        return s
+    nl = s.find("\n")
+    if nl < 0:
         return ""
-    lines = s.splitlines()
-    # remove a single leading H1 ("# ...") to avoid duplicate headings in the output
-    if lines and lines[0].lstrip().startswith("# "):
-        lines = lines[1:]
-        # drop a single blank line after the H1 if it exists
-        if lines and lines[0].strip() == "":
-            lines = lines[1:]
-    return "\n".join(lines).strip()
+    return s[nl + 1 :].strip()
 
 
 def _read_csv_rows(path: Path) -> list[dict[str, str]]:
@@ -41,93 +37,124 @@ def _read_csv_rows(path: Path) -> list[dict[str, str]]:
 
 def _write_text(path: Path, content: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content, encoding="utf-8")
+    path.write_bytes(content.encode("utf-8"))
+
+
+def build_updates(
+    groups: list[dict],
+    homerooms: list[dict],
+    manual_students: list[dict[str, str]],
+    excel_summary: str,
+    exceptions_report: str,
+) -> str:
+    buf = io.StringIO()
+    w = buf.write
+    w(
+        "# עדכונים חשובים (מקור מסונכרן)\n"
+        "\n"
+    )
+    w(f"עודכן לאחרונה: **{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}**\n")
+    w("\n")
+
+    w(
+        "## מה חשוב לזכור\n"
+        "- **כיתה (כיתת אם) אינה הקבצה.**\n"
+        "- הנתונים הרשמיים נשמרים ב-`נתונים/` וממנה נוצרים קבצים/דוחות/אתר.\n"
+        "- מדדים/ציונים נשמרים ב-SQLite באתר ולא נדרסים בסנכרון.\n"
+        "\n"
+    )
+
+    w("## סטטוס מהיר\n")
+    w(f"- מספר הקבצות (בנתונים): **{len(groups)}**\n")
+    w(f"- מספר כיתות אם (בנתונים): **{len(homerooms)}**\n")
+    w(f"- תלמידים ידניים/חריגים (נתונים/תלמידים.csv): **{len([r for r in manual_students if (r.get('full_name') or '').strip()])}**\n")
+    w("\n")
+
+    w(
+        "## סיכום דרישות (ללא כפילות)\n"
+        "### אתר ועמודים\n"
+        "- עמודי ליבה פעילים: בית, נתונים, שכבה, הקבצה, תלמיד, מורה, כיתת אם, מורים, חיפוש, מפת אתר.\n"
+        "- בדף המורים מוצגים רק מורי מתמטיקה.\n"
+        "- כללים ועדכונים מנוהלים כקבצי Markdown בתיקיות הפרויקט (לא מוצגים באתר).\n"
+    )
+    w("- בעמוד הבית: כותרת "
+      "\"מערכת חכמה לניהול תלמידים\" + שורת קרדיט "
+      "\"האתר מנוהל ע\"י יניב רז\"; סיכום תלמידים מוצג בגדול מתחת לכפתורים.\n")
+    w("\n")
+
+    w(
+        "### ניסוח ותוכן\n"
+        "- ללא טקסט דמו/הדרכה בתצוגה.\n"
+        "- ניסוח אחיד ללא נקודתיים בתוויות (לדוגמה: \"14 תלמידים בהקבצה\").\n"
+        "- לשון יחיד/רבים חכמה: \"מורה\" כשיש 1, \"מורים\" כשיש יותר.\n"
+        "\n"
+    )
+
+    w(
+        "### עיצוב וניווט\n"
+        "- צבע ורקע לפי שכבה; בית וכללים נשארים בסגול.\n"
+        "- בעמוד שכבה: רשימת הקבצות אנכית עם גוונים שונים (בהיר/כהה) בתוך צבע השכבה.\n"
+        "- סדר הקבצות קבוע: מדעית → א → א1 → מקדמת.\n"
+        "\n"
+    )
+
+    w(
+        "### נתונים ושמירה\n"
+        "- שמירת מדדים/ציונים במסד SQLite אמיתי (`אתר/data/talmid.db`) עם שמירה גם אחרי סנכרון.\n"
+        "- זיהוי תלמידים שופר: שימוש ב-`student_id` כשקיים כדי לשמר מדדים גם אחרי תיקוני שכבה/כיתת אם.\n"
+        "\n"
+    )
+
+    w(
+        "### הפעלה ואוטומציה\n"
+        "- קיצורי דרך לשולחן העבודה להפעלה/עצירה קבועים של האתר, גם אחרי שינויים.\n"
+        "\n"
+    )
+
+    w(
+        "## קישורים שימושיים\n"
+        "- קובץ כללים מרכזי: `מידע_חשוב.md`\n"
+        "- דוח יבוא אקסל: `דוחות/סיכום_יבוא_אקסל.md`\n"
+        "- דוח חריגים/שילובים: `דוחות/שילובים_וחריגים.md`\n"
+        "\n"
+    )
 
+    if excel_summary:
+        w(
+            "## דוחות\n"
+            "### סיכום יבוא אקסל\n"
+        )
+        w(_strip_leading_h1(excel_summary) + "\n")
+        w("\n")
 
-def main() -> int:
-    team_root = Path(__file__).resolve().parents[1]
+    if exceptions_report:
+        if not excel_summary:
+            w("## דוחות\n")
+        w("### חריגים ושילובים\n")
+        w(_strip_leading_h1(exceptions_report) + "\n")
+        w("\n")
 
-    groups_data = _read_json(team_root / "נתונים" / "הקבצות.json")
-    homerooms_data = _read_json(team_root / "נתונים" / "כיתות_אם.json")
+    return buf.getvalue().rstrip() + "\n"
 
-    groups = groups_data.get("groups") or []
-    homerooms = homerooms_data.get("classes") or []
 
+def write_updates(team_root: Path, groups: list[dict], homerooms: list[dict]) -> None:
+    # Reads the inputs that only this document needs (manual students, reports).
     manual_students = _read_csv_rows(team_root / "נתונים" / "תלמידים.csv")
 
     excel_summary = _read_text(team_root / "דוחות" / "סיכום_יבוא_אקסל.md")
     exceptions_report = _read_text(team_root / "דוחות" / "שילובים_וחריגים.md")
 
-    lines: list[str] = []
-    lines.append("# עדכונים חשובים (מקור מסונכרן)")
-    lines.append("")
-    lines.append(f"עודכן לאחרונה: **{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}**")
-    lines.append("")
-
-    lines.append("## מה חשוב לזכור")
-    lines.append("- **כיתה (כיתת אם) אינה הקבצה.**")
-    lines.append("- הנתונים הרשמיים נשמרים ב-`נתונים/` וממנה נוצרים קבצים/דוחות/אתר.")
-    lines.append("- מדדים/ציונים נשמרים ב-SQLite באתר ולא נדרסים בסנכרון.")
-    lines.append("")
-
-    lines.append("## סטטוס מהיר")
-    lines.append(f"- מספר הקבצות (בנתונים): **{len(groups)}**")
-    lines.append(f"- מספר כיתות אם (בנתונים): **{len(homerooms)}**")
-    lines.append(f"- תלמידים ידניים/חריגים (נתונים/תלמידים.csv): **{len([r for r in manual_students if (r.get('full_name') or '').strip()])}**")
-    lines.append("")
-
-    lines.append("## סיכום דרישות (ללא כפילות)")
-    lines.append("### אתר ועמודים")
-    lines.append("- עמודי ליבה פעילים: בית, נתונים, שכבה, הקבצה, תלמיד, מורה, כיתת אם, מורים, חיפוש, מפת אתר.")
-    lines.append("- בדף המורים מוצגים רק מורי מתמטיקה.")
-    lines.append("- כללים ועדכונים מנוהלים כקבצי Markdown בתיקיות הפרויקט (לא מוצגים באתר).")
-    lines.append("- בעמוד הבית: כותרת "
-                 "\"מערכת חכמה לניהול תלמידים\" + שורת קרדיט "
-                 "\"האתר מנוהל ע\"י יניב רז\"; סיכום תלמידים מוצג בגדול מתחת לכפתורים.")
-    lines.append("")
-
-    lines.append("### ניסוח ותוכן")
-    lines.append("- ללא טקסט דמו/הדרכה בתצוגה.")
-    lines.append("- ניסוח אחיד ללא נקודתיים בתוויות (לדוגמה: \"14 תלמידים בהקבצה\").")
-    lines.append("- לשון יחיד/רבים חכמה: \"מורה\" כשיש 1, \"מורים\" כשיש יותר.")
-    lines.append("")
-
-    lines.append("### עיצוב וניווט")
-    lines.append("- צבע ורקע לפי שכבה; בית וכללים נשארים בסגול.")
-    lines.append("- בעמוד שכבה: רשימת הקבצות אנכית עם גוונים שונים (בהיר/כהה) בתוך צבע השכבה.")
-    lines.append("- סדר הקבצות קבוע: מדעית → א → א1 → מקדמת.")
-    lines.append("")
-
-    lines.append("### נתונים ושמירה")
-    lines.append("- שמירת מדדים/ציונים במסד SQLite אמיתי (`אתר/data/talmid.db`) עם שמירה גם אחרי סנכרון.")
-    lines.append("- זיהוי תלמידים שופר: שימוש ב-`student_id` כשקיים כדי לשמר מדדים גם אחרי תיקוני שכבה/כיתת אם.")
-    lines.append("")
-
-    lines.append("### הפעלה ואוטומציה")
-    lines.append("- קיצורי דרך לשולחן העבודה להפעלה/עצירה קבועים של האתר, גם אחרי שינויים.")
-    lines.append("")
-
-    lines.append("## קישורים שימושיים")
-    lines.append("- קובץ כללים מרכזי: `מידע_חשוב.md`")
-    lines.append("- דוח יבוא אקסל: `דוחות/סיכום_יבוא_אקסל.md`")
-    lines.append("- דוח חריגים/שילובים: `דוחות/שילובים_וחריגים.md`")
-    lines.append("")
+    out_path = team_root / "עדכונים_חשובים.md"
+    _write_text(out_path, build_updates(groups, homerooms, manual_students, excel_summary, exceptions_report))
+
 
-    if excel_summary:
-        lines.append("## דוחות")
-        lines.append("### סיכום יבוא אקסל")
-        lines.append(_strip_leading_h1(excel_summary))
-        lines.append("")
+def main() -> int:
+    team_root = Path(__file__).resolve().parents[1]
 
-    if exceptions_report:
-        if not excel_summary:
-            lines.append("## דוחות")
-        lines.append("### חריגים ושילובים")
-        lines.append(_strip_leading_h1(exceptions_report))
-        lines.append("")
+    groups = read_json_cached(team_root / "נתונים" / "הקבצות.json").get("groups") or []
+    homerooms = read_json_cached(team_root / "נתונים" / "כיתות_אם.json").get("classes") or []
 
-    out_path = team_root / "עדכונים_חשובים.md"
-    _write_text(out_path, "\n".join(lines).rstrip() + "\n")
+    write_updates(team_root, groups, homerooms)
     return 0
 
 
@@ -2,13 +2,25 @@ from __future__ import annotations
 
 import csv
 import json
+import os
 import re
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 from openpyxl import load_workbook
 
+from _io_cache import read_json_cached
+from _tool_helpers import ensure_dir, has_two_header_keywords
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
 
 AUTO_GENERATED_NOTE = "נוצר אוטומטית מייבוא אקסל"
 
@@ -22,16 +34,28 @@ class GroupFolder:
     variant: str | None
     class_hint: str | None
     teachers: list[str]
+    # (weight, _norm_key(value)) for every field _guess_group_folder matches on,
+    # computed once in _load_groups instead of per sheet.
+    match_keys: tuple[tuple[int, str], ...] = ()
 
 
 def _read_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    data = path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps_json(data: dict) -> str:
+    # Same layout either way: 2-space indent, non-ASCII kept as-is.
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(data, ensure_ascii=False, indent=2)
 
 
 def _write_json(path: Path, data: dict) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    ensure_dir(path.parent)
+    path.write_text(_dumps_json(data) + "\n", encoding="utf-8")
 
 
 def _load_excluded_full_names(team_root: Path) -> set[str]:
@@ -39,7 +63,7 @@ def _load_excluded_full_names(team_root: Path) -> set[str]:
     if not path.exists():
         return set()
     try:
-        data = _read_json(path)
+        data = read_json_cached(path)
     except Exception:
         return set()
 
@@ -63,6 +87,13 @@ def _normalize_str(value: Any) -> str:
     return str(value).strip().replace("\n", " ")
 
 
+# Quote marks, dashes and colons separate tokens in a class cell ("ז'1", "ח-2", "ט:3").
+_CLASS_CELL_SEPARATORS = str.maketrans({ch: " " for ch in "'׳\"״-:"})
+_DIGITS_RE = re.compile(r"(\d+)")
+
+
+# Class cells repeat for every student in a homeroom, so each distinct value is parsed once.
+@lru_cache(maxsize=1024)
 def _normalize_homeroom_class(value: str) -> tuple[str, str]:
     """Return (normalized_homeroom, warning).
 
@@ -74,16 +105,14 @@ def _normalize_homeroom_class(value: str) -> tuple[str, str]:
         return "", ""
 
     # Tokenize while removing quotes/apostrophes
-    raw_simple = raw
-    for ch in ["'", "׳", '"', "״", "-", ":"]:
-        raw_simple = raw_simple.replace(ch, " ")
+    raw_simple = raw.translate(_CLASS_CELL_SEPARATORS)
     tokens = [t for t in raw_simple.split() if t]
 
     group_tokens = {"א", "א1", "מדעית", "מקדמת"}
     has_group_token = any(t in group_tokens for t in tokens)
 
     grade_letter = next((t for t in tokens if t in ["ז", "ח", "ט"]), "")
-    m = re.search(r"(\d+)", raw_simple)
+    m = _DIGITS_RE.search(raw_simple)
     digits = m.group(1) if m else ""
 
     # Example of wrong data: "ח א" or "ט א" => grouping mistakenly placed in class column
@@ -105,32 +134,39 @@ def _normalize_homeroom_class(value: str) -> tuple[str, str]:
     return raw, "הערה: ערך כיתה לא זוהה ככיתת אם תקנית"
 
 
+# Quotes, geresh/gershayim, spaces, dashes and underscores are ignored when matching names.
+_NORM_DROP = str.maketrans("", "", "\"'׳״ -_")
+
+
+@lru_cache(maxsize=4096)
 def _norm_key(text: str) -> str:
-    return (
-        text.replace("\"", "")
-        .replace("'", "")
-        .replace("׳", "")
-        .replace("״", "")
-        .replace(" ", "")
-        .replace("-", "")
-        .replace("_", "")
-        .lower()
-    )
+    return text.translate(_NORM_DROP).lower()
 
 
 def _load_groups(team_root: Path) -> list[GroupFolder]:
-    data = _read_json(team_root / "נתונים" / "הקבצות.json")
+    data = read_json_cached(team_root / "נתונים" / "הקבצות.json")
     groups: list[GroupFolder] = []
     for entry in data.get("groups") or []:
+        grade = entry.get("grade", "")
+        subject = entry.get("subject", "")
+        group_name = entry.get("group_name", "")
+        variant = entry.get("variant")
+        class_hint = entry.get("class_hint")
+        teachers = list(entry.get("teachers") or [])
+
+        # teacher name in sheet title helps disambiguate (e.g., "נורית מויאל")
+        weighted = [(3, grade), (3, group_name), (2, class_hint), (1, subject), (1, variant)]
+        weighted += [(4, t) for t in teachers]
         groups.append(
             GroupFolder(
-                grade=entry.get("grade", ""),
-                subject=entry.get("subject", ""),
-                group_name=entry.get("group_name", ""),
+                grade=grade,
+                subject=subject,
+                group_name=group_name,
                 folder=entry.get("folder", ""),
-                variant=entry.get("variant"),
-                class_hint=entry.get("class_hint"),
-                teachers=list(entry.get("teachers") or []),
+                variant=variant,
+                class_hint=class_hint,
+                teachers=teachers,
+                match_keys=tuple((weight, _norm_key(value)) for weight, value in weighted if value),
             )
         )
     return groups
@@ -139,69 +175,51 @@ def _load_groups(team_root: Path) -> list[GroupFolder]:
 def _guess_group_folder(sheet_name: str, groups: list[GroupFolder]) -> str | None:
     s = _norm_key(sheet_name)
 
-    candidates: list[tuple[int, GroupFolder]] = []
+    # Single pass tracking the top score; a tie at the top means the sheet is ambiguous.
+    # No early exit: teacher weights add up, so there is no fixed maximum score to stop at.
+    best_score = 0
+    best: GroupFolder | None = None
+    tied = False
     for g in groups:
-        score = 0
-        if g.grade and _norm_key(g.grade) in s:
-            score += 3
-        if g.group_name and _norm_key(g.group_name) in s:
-            score += 3
-        if g.class_hint and _norm_key(g.class_hint) in s:
-            score += 2
-        if g.subject and _norm_key(g.subject) in s:
-            score += 1
-        if g.variant and _norm_key(g.variant) in s:
-            score += 1
-        # teacher name in sheet title helps disambiguate (e.g., "נורית מויאל")
-        for t in g.teachers:
-            if t and _norm_key(t) in s:
-                score += 4
-        if score > 0:
-            candidates.append((score, g))
+        score = sum(weight for weight, key in g.match_keys if key in s)
+        if score > best_score:
+            best_score, best, tied = score, g, False
+        elif score == best_score and score > 0:
+            tied = True
 
-    if not candidates:
+    if best is None or tied:
         return None
 
-    candidates.sort(key=lambda t: t[0], reverse=True)
-    best_score = candidates[0][0]
-    best = [g for score, g in candidates if score == best_score]
-    if len(best) != 1:
-        return None
+    return best.folder or None
+
 
-    return best[0].folder or None
+# Runs of anything but letters/digits (underscore included) become a single "_".
+_UNSAFE_FILENAME_RE = re.compile(r"[\W_]+")
+_FILENAME_DROP = str.maketrans("", "", "׳\"'")
 
 
 def _safe_filename(text: str) -> str:
-    # Keep Hebrew/letters/digits; replace others with underscore
-    cleaned = []
-    for ch in text.strip():
-        if ch.isalnum() or ch in ["א", "ב", "ג", "ד", "ה", "ו", "ז", "ח", "ט", "י", "כ", "ל", "מ", "נ", "ס", "ע", "פ", "צ", "ק", "ר", "ש", "ת", " ", "׳", "'", "\""]:
-            cleaned.append(ch)
-        else:
-            cleaned.append(" ")
-    s = "".join(cleaned)
-    # normalize spaces/quotes
-    s = s.replace("׳", "").replace("\"", "").replace("'", "")
-    s = "_".join([p for p in s.split() if p])
+    # Keep Hebrew/letters/digits; quotes are dropped, everything else separates words.
+    s = text.strip().translate(_FILENAME_DROP)
+    s = _UNSAFE_FILENAME_RE.sub("_", s).strip("_")
     if not s:
         return "sheet"
     return s[:80]
 
 
 def _find_header_row(ws, scan_rows: int = 30, scan_cols: int = 30) -> tuple[int | None, list[str]]:
-    keywords = ["שם", "משפחה", "פרטי", "תלמיד", "כיתה", "תז", "ת.ז", "תעודת", "זהות"]
-
-    for r in range(1, min(ws.max_row, scan_rows) + 1):
-        values = [_normalize_str(ws.cell(row=r, column=c).value) for c in range(1, scan_cols + 1)]
+    # values_only rows skip Cell objects; in read-only mode ws.max_row may be None,
+    # so let the iterator stop at the end of the sheet.
+    rows = ws.iter_rows(min_row=1, max_row=scan_rows, max_col=scan_cols, values_only=True)
+    for r, row in enumerate(rows, start=1):
+        values = [_normalize_str(v) for v in row]
         while values and values[-1] == "":
             values.pop()
         if not values:
             continue
 
-        joined = " ".join(values)
-        hits = sum(1 for k in keywords if k in joined)
         non_empty = sum(1 for v in values if v)
-        if hits >= 2 and non_empty >= 2:
+        if non_empty >= 2 and has_two_header_keywords(" ".join(values)):
             return r, values
 
     return None, []
@@ -226,14 +244,12 @@ def _pick_column(headers_map: dict[str, int], aliases: list[str]) -> int | None:
     return None
 
 
-def _iter_data_rows(ws, start_row: int, max_cols: int) -> list[list[str]]:
-    rows: list[list[str]] = []
-    for r in range(start_row, ws.max_row + 1):
-        values = [_normalize_str(ws.cell(row=r, column=c).value) for c in range(1, max_cols + 1)]
-        if not any(v for v in values):
-            continue
-        rows.append(values)
-    return rows
+def _iter_data_rows(ws, start_row: int, max_cols: int) -> Iterator[list[str]]:
+    # Streamed straight from the read-only sheet; nothing is held per sheet.
+    for row in ws.iter_rows(min_row=start_row, max_col=max_cols, values_only=True):
+        values = [_normalize_str(v) for v in row]
+        if any(values):
+            yield values
 
 
 def _split_full_name(full_name: str) -> tuple[str, str]:
@@ -245,23 +261,155 @@ def _split_full_name(full_name: str) -> tuple[str, str]:
     return "", ""
 
 
-def _write_students_csv(path: Path, rows: list[dict[str, str]]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    fieldnames = [
-        "student_id",
-        "first_name",
-        "last_name",
-        "full_name",
-        "homeroom_class",
-        "homeroom_class_raw",
-        "source_sheet",
-        "notes",
-    ]
+# Column order of the roster CSVs; rows are built as tuples in this order.
+STUDENT_CSV_FIELDS = (
+    "student_id",
+    "first_name",
+    "last_name",
+    "full_name",
+    "homeroom_class",
+    "homeroom_class_raw",
+    "source_sheet",
+    "notes",
+)
+
+
+def _write_students_csv(path: Path, rows: list[tuple[str, ...]]) -> None:
+    ensure_dir(path.parent)
     with path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow({k: row.get(k, "") for k in fieldnames})
+        writer = csv.writer(f)
+        writer.writerow(STUDENT_CSV_FIELDS)
+        writer.writerows(rows)
+
+
+def _import_sheet(
+    ws,
+    sheet_name: str,
+    folder: str,
+    sheet_cfg: dict,
+    excluded_names: set[str],
+    team_root: Path,
+    source_name: str,
+) -> dict[str, Any]:
+    header_row, headers = _find_header_row(ws)
+    if header_row is None:
+        return {"sheet": sheet_name, "status": "no_header", "folder": folder}
+
+    headers_map = _build_column_index(headers)
+
+    columns_cfg = (sheet_cfg.get("columns") or {})
+    student_id_aliases = columns_cfg.get("student_id") or ["תז", "ת.ז", "תעודת זהות", "מספר זהות"]
+    first_aliases = columns_cfg.get("first_name") or ["שם פרטי"]
+    last_aliases = columns_cfg.get("last_name") or ["שם משפחה"]
+    full_aliases = columns_cfg.get("full_name") or ["שם מלא", "שם תלמיד", "שם"]
+    class_aliases = columns_cfg.get("homeroom_class") or ["כיתה", "כיתת אם"]
+    notes_aliases = columns_cfg.get("notes") or ["הערות"]
+
+    idx_id = _pick_column(headers_map, student_id_aliases)
+    idx_first = _pick_column(headers_map, first_aliases)
+    idx_last = _pick_column(headers_map, last_aliases)
+    idx_full = _pick_column(headers_map, full_aliases)
+    idx_class = _pick_column(headers_map, class_aliases)
+    idx_notes = _pick_column(headers_map, notes_aliases)
+
+    max_cols = max(1, len(headers))
+
+    students: list[tuple[str, ...]] = []
+    for row in _iter_data_rows(ws, header_row + 1, max_cols):
+        student_id = row[idx_id] if idx_id is not None and idx_id < len(row) else ""
+        first_name = row[idx_first] if idx_first is not None and idx_first < len(row) else ""
+        last_name = row[idx_last] if idx_last is not None and idx_last < len(row) else ""
+        full_name = row[idx_full] if idx_full is not None and idx_full < len(row) else ""
+        homeroom_class_raw = row[idx_class] if idx_class is not None and idx_class < len(row) else ""
+        notes = row[idx_notes] if idx_notes is not None and idx_notes < len(row) else ""
+
+        if not full_name and (first_name or last_name):
+            full_name = " ".join([p for p in [first_name, last_name] if p])
+
+        if full_name and (not first_name and not last_name):
+            first_name, last_name = _split_full_name(full_name)
+
+        full_name_for_exclusion = re.sub(
+            r"\s+",
+            " ",
+            (" ".join([p for p in [first_name, last_name] if _normalize_str(p)]) or full_name or "").strip(),
+        ).strip()
+        if full_name_for_exclusion and full_name_for_exclusion in excluded_names:
+            continue
+
+        # Skip rows that don't look like students
+        if not (full_name or first_name or last_name):
+            continue
+
+        homeroom_class, warning = _normalize_homeroom_class(homeroom_class_raw)
+        if warning:
+            notes = (notes + " | " + warning).strip(" |") if notes else warning
+
+        students.append(
+            (
+                student_id,
+                first_name,
+                last_name,
+                full_name,
+                homeroom_class,
+                homeroom_class_raw,
+                sheet_name,
+                notes,
+            )
+        )
+
+    output_folder = team_root / folder
+    sheet_slug = _safe_filename(sheet_name)
+    out_csv = output_folder / f"תלמידים_מהאקסל__{sheet_slug}.csv"
+    _write_students_csv(out_csv, students)
+
+    info = {
+        "source_excel": source_name,
+        "source_sheet": sheet_name,
+        "group_folder": folder,
+        "import_note": AUTO_GENERATED_NOTE,
+        "detected": {
+            "header_row": header_row,
+            "headers": [h for h in headers if h],
+            "columns": {
+                "student_id": idx_id,
+                "first_name": idx_first,
+                "last_name": idx_last,
+                "full_name": idx_full,
+                "homeroom_class": idx_class,
+                "notes": idx_notes,
+            },
+        },
+        "counts": {"students": len(students)},
+    }
+    _write_json(output_folder / f"excel_import_info__{sheet_slug}.json", info)
+
+    return {"sheet": sheet_name, "status": "imported", "folder": folder, "students": len(students)}
+
+
+# Below this workbook size the sheets import faster in one process than worker
+# processes start (with spawn, as on Windows, each worker re-imports openpyxl).
+_PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+
+_worker_wb = None
+
+
+def _open_worker_workbook(xlsx_path: str) -> None:
+    # Pool initializer: openpyxl workbooks can't be pickled, so each worker opens
+    # the file once and serves all of its sheets from that copy.
+    global _worker_wb
+    _worker_wb = load_workbook(xlsx_path, read_only=True, data_only=True)
+
+
+def _import_sheet_in_worker(
+    sheet_name: str,
+    folder: str,
+    sheet_cfg: dict,
+    excluded_names: set[str],
+    team_root: Path,
+    source_name: str,
+) -> dict[str, Any]:
+    return _import_sheet(_worker_wb[sheet_name], sheet_name, folder, sheet_cfg, excluded_names, team_root, source_name)
 
 
 def main() -> int:
@@ -275,20 +423,23 @@ def main() -> int:
 
     excluded_names = _load_excluded_full_names(team_root)
 
+    # The mapping is edited and written back below, so parse a private copy (not the shared cache).
     mapping = _read_json(mapping_path) if mapping_path.exists() else {"version": 1, "sheets": {}}
     sheets_mapping: dict[str, dict] = mapping.get("sheets") or {}
 
-    wb = load_workbook(default_excel, data_only=True)
+    wb = load_workbook(default_excel, read_only=True, data_only=True)
 
     unmapped: list[str] = []
     summary: list[dict[str, Any]] = []
 
+    # Resolve folders up front (cheap, needs `groups`); the sheets to import are then independent.
+    jobs: list[tuple[str, str, dict]] = []
+    slots: list[dict[str, Any] | None] = []
     for sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
         sheet_cfg = sheets_mapping.get(sheet_name) or {}
 
         if sheet_cfg.get("ignore") is True:
-            summary.append({"sheet": sheet_name, "status": "ignored"})
+            slots.append({"sheet": sheet_name, "status": "ignored"})
             continue
 
         folder = sheet_cfg.get("group_folder")
@@ -297,111 +448,45 @@ def main() -> int:
             folder = _guess_group_folder(sheet_name, groups)
 
         if not folder:
-            unmapped.append(sheet_name)
-            summary.append({"sheet": sheet_name, "status": "unmapped"})
+            slots.append({"sheet": sheet_name, "status": "unmapped"})
             continue
 
-        header_row, headers = _find_header_row(ws)
-        if header_row is None:
-            unmapped.append(sheet_name)
-            summary.append({"sheet": sheet_name, "status": "no_header", "folder": folder})
-            continue
-
-        headers_map = _build_column_index(headers)
-
-        columns_cfg = (sheet_cfg.get("columns") or {})
-        student_id_aliases = columns_cfg.get("student_id") or ["תז", "ת.ז", "תעודת זהות", "מספר זהות"]
-        first_aliases = columns_cfg.get("first_name") or ["שם פרטי"]
-        last_aliases = columns_cfg.get("last_name") or ["שם משפחה"]
-        full_aliases = columns_cfg.get("full_name") or ["שם מלא", "שם תלמיד", "שם"]
-        class_aliases = columns_cfg.get("homeroom_class") or ["כיתה", "כיתת אם"]
-        notes_aliases = columns_cfg.get("notes") or ["הערות"]
-
-        idx_id = _pick_column(headers_map, student_id_aliases)
-        idx_first = _pick_column(headers_map, first_aliases)
-        idx_last = _pick_column(headers_map, last_aliases)
-        idx_full = _pick_column(headers_map, full_aliases)
-        idx_class = _pick_column(headers_map, class_aliases)
-        idx_notes = _pick_column(headers_map, notes_aliases)
-
-        max_cols = max(1, len(headers))
-        data_rows = _iter_data_rows(ws, header_row + 1, max_cols)
-
-        students: list[dict[str, str]] = []
-        for row in data_rows:
-            student_id = row[idx_id] if idx_id is not None and idx_id < len(row) else ""
-            first_name = row[idx_first] if idx_first is not None and idx_first < len(row) else ""
-            last_name = row[idx_last] if idx_last is not None and idx_last < len(row) else ""
-            full_name = row[idx_full] if idx_full is not None and idx_full < len(row) else ""
-            homeroom_class_raw = row[idx_class] if idx_class is not None and idx_class < len(row) else ""
-            notes = row[idx_notes] if idx_notes is not None and idx_notes < len(row) else ""
-
-            if not full_name and (first_name or last_name):
-                full_name = " ".join([p for p in [first_name, last_name] if p])
-
-            if full_name and (not first_name and not last_name):
-                first_name, last_name = _split_full_name(full_name)
-
-            full_name_for_exclusion = re.sub(
-                r"\s+",
-                " ",
-                (" ".join([p for p in [first_name, last_name] if _normalize_str(p)]) or full_name or "").strip(),
-            ).strip()
-            if full_name_for_exclusion and full_name_for_exclusion in excluded_names:
-                continue
-
-            # Skip rows that don't look like students
-            if not (full_name or first_name or last_name):
-                continue
-
-            homeroom_class, warning = _normalize_homeroom_class(homeroom_class_raw)
-            if warning:
-                notes = (notes + " | " + warning).strip(" |") if notes else warning
-
-            students.append(
-                {
-                    "student_id": student_id,
-                    "first_name": first_name,
-                    "last_name": last_name,
-                    "full_name": full_name,
-                    "homeroom_class": homeroom_class,
-                    "homeroom_class_raw": homeroom_class_raw,
-                    "source_sheet": sheet_name,
-                    "notes": notes,
-                }
-            )
-
-        output_folder = team_root / folder
-        sheet_slug = _safe_filename(sheet_name)
-        out_csv = output_folder / f"תלמידים_מהאקסל__{sheet_slug}.csv"
-        _write_students_csv(out_csv, students)
-
-        info = {
-            "source_excel": str(default_excel.name),
-            "source_sheet": sheet_name,
-            "group_folder": folder,
-            "import_note": AUTO_GENERATED_NOTE,
-            "detected": {
-                "header_row": header_row,
-                "headers": [h for h in headers if h],
-                "columns": {
-                    "student_id": idx_id,
-                    "first_name": idx_first,
-                    "last_name": idx_last,
-                    "full_name": idx_full,
-                    "homeroom_class": idx_class,
-                    "notes": idx_notes,
-                },
-            },
-            "counts": {"students": len(students)},
-        }
-        _write_json(output_folder / f"excel_import_info__{sheet_slug}.json", info)
-
-        summary.append({"sheet": sheet_name, "status": "imported", "folder": folder, "students": len(students)})
-
-        # keep mapping up to date
-        sheets_mapping.setdefault(sheet_name, {})
-        sheets_mapping[sheet_name]["group_folder"] = folder
+        jobs.append((sheet_name, folder, sheet_cfg))
+        slots.append(None)
+
+    # Large workbooks are parsed in worker processes when there is more than one core;
+    # the bundled workbook is far below the threshold and always takes the serial loop.
+    workers = min(len(jobs), os.cpu_count() or 1)
+    if workers > 1 and default_excel.stat().st_size >= _PARALLEL_MIN_BYTES:
+        wb.close()
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_open_worker_workbook, initargs=(str(default_excel),)
+        ) as pool:
+            futures = [
+                pool.submit(_import_sheet_in_worker, name, folder, cfg, excluded_names, team_root, default_excel.name)
+                for name, folder, cfg in jobs
+            ]
+            results = [f.result() for f in futures]
+    else:
+        # wb[name] scans every sheet; index them by title once.
+        worksheets = {ws.title: ws for ws in wb.worksheets}
+        results = [
+            _import_sheet(worksheets[name], name, folder, cfg, excluded_names, team_root, default_excel.name)
+            for name, folder, cfg in jobs
+        ]
+        wb.close()
+
+    # Merge back in workbook order so the report and mapping don't depend on scheduling.
+    imported_iter = iter(results)
+    for slot in slots:
+        item = slot if slot is not None else next(imported_iter)
+        summary.append(item)
+        if item["status"] in ("unmapped", "no_header"):
+            unmapped.append(item["sheet"])
+        if item["status"] == "imported":
+            # keep mapping up to date
+            sheets_mapping.setdefault(item["sheet"], {})
+            sheets_mapping[item["sheet"]]["group_folder"] = item["folder"]
 
     mapping["sheets"] = sheets_mapping
     _write_json(mapping_path, mapping)
@@ -429,7 +514,7 @@ def main() -> int:
         for name in unmapped:
             report_lines.append(f"- {name}")
 
-    (team_root / "דוחות").mkdir(parents=True, exist_ok=True)
+    ensure_dir(team_root / "דוחות")
     (team_root / "דוחות" / "סיכום_יבוא_אקסל.md").write_text("\n".join(report_lines) + "\n", encoding="utf-8")
 
     # Print only sheet names + statuses (no student names)
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import io
+import sys
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
-from openpyxl import load_workbook
+from _io_cache import read_derived_cache, write_derived_cache
+from _tool_helpers import has_two_header_keywords
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SheetSummary:
     name: str
     max_row: int
@@ -16,40 +20,55 @@ class SheetSummary:
     headers: list[str]
 
 
+# Pure on hashable cell values. Sheets built from the same template repeat the same
+# headers, so each distinct value is normalized once. typed=True keeps 1, 1.0 and True
+# apart (their str() differs); results are interned so equal headers share one object.
+@lru_cache(maxsize=4096, typed=True)
 def _normalize_header(value: Any) -> str:
     if value is None:
         return ""
-    return str(value).strip().replace("\n", " ")
+    return sys.intern(str(value).strip().replace("\n", " "))
 
 
-def _looks_like_header_row(values: list[str]) -> bool:
-    joined = " ".join(values)
-    keywords = ["שם", "משפחה", "פרטי", "תלמיד", "כיתה", "תז", "ת.ז", "תעודת", "זהות"]
-    hits = sum(1 for k in keywords if k in joined)
+@lru_cache(maxsize=1024)
+def _looks_like_header_row(values: tuple[str, ...]) -> bool:
     non_empty = sum(1 for v in values if v)
-    return hits >= 2 and non_empty >= 2
+    return non_empty >= 2 and has_two_header_keywords(" ".join(values))
 
 
 def _find_header_row(ws, scan_rows: int = 20, scan_cols: int = 20) -> tuple[int | None, list[str]]:
-    for r in range(1, min(ws.max_row, scan_rows) + 1):
-        values = [_normalize_header(ws.cell(row=r, column=c).value) for c in range(1, scan_cols + 1)]
-        # trim trailing empties
-        while values and values[-1] == "":
-            values.pop()
-        if not values:
+    # values_only rows skip Cell objects; in read-only mode ws.max_row may be None,
+    # so let the iterator stop at the end of the sheet.
+    rows = ws.iter_rows(min_row=1, max_row=scan_rows, max_col=scan_cols, values_only=True)
+    for r, row in enumerate(rows, start=1):
+        # Only the non-empty cells matter here: they are the reported headers, and no
+        # header keyword spans a cell boundary, so blanks can't change the match.
+        headers = [v for v in map(_normalize_header, row) if v]
+        # A header row needs at least two filled cells; skip the keyword test otherwise.
+        if len(headers) < 2:
             continue
-        if _looks_like_header_row(values):
-            headers = [v for v in values if v]
+        if _looks_like_header_row(tuple(headers)):
             return r, headers
     return None, []
 
 
 def summarize_workbook(excel_path: Path) -> list[SheetSummary]:
-    wb = load_workbook(excel_path, data_only=True)
+    # Reuse the previous run's result while the workbook is unchanged (same mtime and size).
+    cache_path = excel_path.with_suffix(".summary.json")
+    cached = read_derived_cache(cache_path, excel_path)
+    if cached is not None:
+        return [SheetSummary(**item) for item in cached]
+
+    # Imported here so a cache hit (or a missing workbook) never pays for loading openpyxl.
+    from openpyxl import load_workbook
+
+    # Read-only streams each sheet's XML instead of building the full cell model.
+    # Sizes come from the sheet's stored dimensions (0 when the file doesn't record them).
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
     summaries: list[SheetSummary] = []
 
-    for name in wb.sheetnames:
-        ws = wb[name]
+    for ws in wb.worksheets:
+        name = ws.title
         header_row, headers = _find_header_row(ws)
         summaries.append(
             SheetSummary(
@@ -61,6 +80,8 @@ def summarize_workbook(excel_path: Path) -> list[SheetSummary]:
             )
         )
 
+    wb.close()
+    write_derived_cache(cache_path, excel_path, [asdict(s) for s in summaries])
     return summaries
 
 
@@ -74,20 +95,25 @@ def main() -> int:
         return 1
 
     summaries = summarize_workbook(excel_path)
-    print(f"Workbook: {excel_path.name}")
-    print(f"Sheets: {len(summaries)}")
-    print("")
+
+    # Build the whole report and write it once instead of a print() per line.
+    buf = io.StringIO()
+    w = buf.write
+    w(f"Workbook: {excel_path.name}\n")
+    w(f"Sheets: {len(summaries)}\n")
+    w("\n")
 
     for s in summaries:
-        print(f"- {s.name}")
-        print(f"  size: rows={s.max_row} cols={s.max_col}")
-        print(f"  header_row: {s.header_row if s.header_row is not None else 'NOT FOUND'}")
+        w(f"- {s.name}\n")
+        w(f"  size: rows={s.max_row} cols={s.max_col}\n")
+        w(f"  header_row: {s.header_row if s.header_row is not None else 'NOT FOUND'}\n")
         if s.headers:
             shown = s.headers[:12]
-            print(f"  headers: {shown}{' ...' if len(s.headers) > 12 else ''}")
+            w(f"  headers: {shown}{' ...' if len(s.headers) > 12 else ''}\n")
         else:
-            print("  headers: []")
+            w("  headers: []\n")
 
+    sys.stdout.write(buf.getvalue())
     return 0
 
 
@@ -27,8 +27,7 @@ Invoke-PythonScript 'generate_structure.py'
 Invoke-PythonScript 'import_excel_students.py'
 Invoke-PythonScript 'generate_manual_group_students.py'
 Invoke-PythonScript 'generate_reports.py'
-Invoke-PythonScript 'generate_summary.py'
-Invoke-PythonScript 'generate_updates.py'
+Invoke-PythonScript 'generate_docs.py'
 Invoke-PythonScript 'validate_data.py'
 
 Write-Host "DONE"
@@ -1,27 +1,29 @@
 from __future__ import annotations
 
-import json
+import io
+import posixpath
+import sys
+import xml.etree.ElementTree as ET
+import zipfile
+from collections.abc import Callable
 from pathlib import Path
 
-from openpyxl import load_workbook
+from _io_cache import read_derived_cache, read_json_cached, write_derived_cache
 
+try:
+    import ahocorasick
+except ImportError:  # optional speedup; plain substring checks are the fallback
+    ahocorasick = None
 
-def main() -> int:
-    team_root = Path(__file__).resolve().parents[1]
-    repo_root = team_root.parent
-
-    excel_path = repo_root / "הקבצות_מבחן_מיפוי_במקום_הערכה1.xlsx"
-    if not excel_path.exists():
-        print(f"ERROR: missing excel: {excel_path}")
-        return 1
+try:
+    import ijson
+except ImportError:  # optional; the whole file is parsed (orjson/json) without it
+    ijson = None
 
-    groups_path = team_root / "נתונים" / "הקבצות.json"
-    with groups_path.open("r", encoding="utf-8") as f:
-        groups = (json.load(f).get("groups") or [])
 
-    teacher_names = sorted({t for g in groups for t in (g.get("teachers") or []) if t})
-    # common variants
-    teacher_names += [
+# Spellings that appear in sheet titles but not (or not only) in הקבצות.json.
+_TEACHER_NAME_VARIANTS = frozenset(
+    {
         "אוסנת קריפט",
         "אסנת קריפט",
         "אילנית רז",
@@ -31,10 +33,195 @@ def main() -> int:
         "סוניה רפאלי",
         "נעמי שניידר",
         "נורית מויאל",
-    ]
-    teacher_names = sorted(set(teacher_names))
+    }
+)
+
+
+def _load_teacher_names(groups_path: Path) -> set[str]:
+    if ijson is not None:
+        # Stream just the teacher strings; the group dicts around them are never built.
+        with groups_path.open("rb") as f:
+            return {t for t in ijson.items(f, "groups.item.teachers.item") if t}
+
+    groups = read_json_cached(groups_path).get("groups") or []
+    return {t for g in groups for t in (g.get("teachers") or []) if t}
+
+
+def _build_teacher_matcher(teacher_names: list[str]) -> Callable[[str], set[str]]:
+    names = [t for t in teacher_names if t]
+    if ahocorasick is None:
+        return lambda text: {t for t in names if t in text}
+
+    # One automaton for all names: each sheet's text is scanned once, and overlapping
+    # or prefix-sharing names are all reported, same as the `in` checks.
+    automaton = ahocorasick.Automaton()
+    for name in names:
+        automaton.add_word(name, name)
+    automaton.make_automaton()
+    return lambda text: {name for _, name in automaton.iter(text)}
+
+
+# Cells are joined with a character that can't occur in a teacher name, so a match never
+# spans two cells; NUL keeps the joined text as short as possible.
+_CELL_SEPARATOR = "\0"
+
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_REL_OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_REL_SHARED_STRINGS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings"
+
+_CAPTURE_ROWS = 5
+_CAPTURE_COLS = 10
+
+
+def _rels_path(part: str) -> str:
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", name + ".rels")
+
+
+def _read_rels(z: zipfile.ZipFile, part: str) -> dict[str, tuple[str, str]]:
+    # rId -> (type, zip member path) for the relationships of `part` ("" = package root).
+    folder = posixpath.dirname(part)
+    root = ET.fromstring(z.read(_rels_path(part)))
+    rels: dict[str, tuple[str, str]] = {}
+    for rel in root.iter(f"{_NS_PKG_REL}Relationship"):
+        target = rel.get("Target", "")
+        path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(folder, target))
+        rels[rel.get("Id", "")] = (rel.get("Type", ""), path)
+    return rels
+
+
+def _column_index(ref: str) -> int:
+    # "C5" -> 3
+    n = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        n = n * 26 + (ord(ch.upper()) - 64)
+    return n
 
-    wb = load_workbook(excel_path, data_only=True)
+
+def _string_item_text(si: ET.Element) -> str:
+    # Plain <t>, or the runs of rich text; phonetic hints (<rPh>) are not part of the value.
+    t = si.find(f"{_NS_MAIN}t")
+    if t is not None:
+        return t.text or ""
+    return "".join(r.findtext(f"{_NS_MAIN}t") or "" for r in si.iter(f"{_NS_MAIN}r"))
+
+
+def _cell_text(c: ET.Element, shared_strings: Callable[[], list[str]]) -> str | None:
+    # Same text openpyxl's value would give via str(); dates stay serial numbers, which is
+    # fine for name matching.
+    kind = c.get("t", "n")
+    if kind == "inlineStr":
+        is_ = c.find(f"{_NS_MAIN}is")
+        return _string_item_text(is_) if is_ is not None else None
+    v = c.findtext(f"{_NS_MAIN}v")
+    if not v:  # no value, or a formula without a cached result
+        return None
+    if kind == "s":
+        return shared_strings()[int(v)]
+    if kind == "b":
+        return str(bool(int(v)))
+    if kind == "n":
+        return str(float(v) if ("." in v or "E" in v or "e" in v) else int(v))
+    return v
+
+
+def _capture_sheet_texts(excel_path: Path, target_sheets: list[str]) -> dict[str, str]:
+    # Text of the top-left 5x10 block of each target sheet (sheets not in the workbook are left out).
+    # Only those six small regions are needed, so the sheet XML is read straight from the
+    # .xlsx zip instead of loading the workbook through openpyxl; shared strings are
+    # parsed only if a captured cell refers to them.
+    targets = set(target_sheets)
+    texts: dict[str, str] = {}
+    with zipfile.ZipFile(excel_path) as z:
+        workbook_part = next(
+            path for kind, path in _read_rels(z, "").values() if kind == _REL_OFFICE_DOCUMENT
+        )
+        workbook_rels = _read_rels(z, workbook_part)
+
+        strings: list[str] | None = None
+
+        def shared_strings() -> list[str]:
+            nonlocal strings
+            if strings is None:
+                part = next((path for kind, path in workbook_rels.values() if kind == _REL_SHARED_STRINGS), None)
+                strings = []
+                if part is not None:
+                    for _, el in ET.iterparse(z.open(part)):
+                        if el.tag == f"{_NS_MAIN}si":
+                            strings.append(_string_item_text(el))
+                            el.clear()
+            return strings
+
+        # One pass over the workbook, in sheet order; callers look results up by name.
+        workbook = ET.fromstring(z.read(workbook_part))
+        for sheet_el in workbook.iter(f"{_NS_MAIN}sheet"):
+            sheet = sheet_el.get("name", "")
+            if sheet not in targets:
+                continue
+
+            _, sheet_part = workbook_rels[sheet_el.get(f"{_NS_REL}id", "")]
+            captured: list[str] = []
+            with z.open(sheet_part) as f:
+                row_number = 0
+                for _, el in ET.iterparse(f):
+                    if el.tag != f"{_NS_MAIN}row":
+                        continue
+                    row_number = int(el.get("r") or row_number + 1)
+                    if row_number > _CAPTURE_ROWS:
+                        break
+                    col = 0
+                    for c in el.iter(f"{_NS_MAIN}c"):
+                        ref = c.get("r")
+                        col = _column_index(ref) if ref else col + 1
+                        if col > _CAPTURE_COLS:
+                            break
+                        v = _cell_text(c, shared_strings)
+                        if v is None:
+                            continue
+                        s = v.strip()
+                        if s:
+                            captured.append(s)
+                    el.clear()
+
+            texts[sheet] = _CELL_SEPARATOR.join(captured)
+
+    return texts
+
+
+def _captured_texts(excel_path: Path, target_sheets: list[str]) -> dict[str, str]:
+    # The captured text depends only on the workbook and the sheet list, so it is cached
+    # next to the workbook; teacher names are matched fresh on every run.
+    cache_path = excel_path.with_suffix(".teachers_scan.json")
+    cached = read_derived_cache(cache_path, excel_path)
+    if cached is not None and cached.get("sheets") == target_sheets and cached.get("separator") == _CELL_SEPARATOR:
+        return cached["texts"]
+
+    texts = _capture_sheet_texts(excel_path, target_sheets)
+    write_derived_cache(
+        cache_path,
+        excel_path,
+        {"sheets": target_sheets, "separator": _CELL_SEPARATOR, "texts": texts},
+    )
+    return texts
+
+
+def main() -> int:
+    team_root = Path(__file__).resolve().parents[1]
+    repo_root = team_root.parent
+
+    excel_path = repo_root / "הקבצות_מבחן_מיפוי_במקום_הערכה1.xlsx"
+    if not excel_path.exists():
+        print(f"ERROR: missing excel: {excel_path}")
+        return 1
+
+    groups_path = team_root / "נתונים" / "הקבצות.json"
+    teacher_names = sorted(_load_teacher_names(groups_path) | _TEACHER_NAME_VARIANTS)
+    match_teachers = _build_teacher_matcher(teacher_names)
 
     target_sheets = [
         "ז׳ א׳",
@@ -45,26 +232,19 @@ def main() -> int:
         "ט׳ 2 מקדמת",
     ]
 
+    texts = _captured_texts(excel_path, target_sheets)
+    buf = io.StringIO()
+    w = buf.write
     for sheet in target_sheets:
-        if sheet not in wb.sheetnames:
-            print(f"- {sheet}: not found")
+        joined = texts.get(sheet)
+        if joined is None:
+            w(f"- {sheet}: not found\n")
             continue
 
-        ws = wb[sheet]
-        captured: list[str] = []
-        for r in range(1, 6):
-            for c in range(1, 11):
-                v = ws.cell(row=r, column=c).value
-                if v is None:
-                    continue
-                s = str(v).strip()
-                if s:
-                    captured.append(s)
-
-        joined = " | ".join(captured)
-        hits = sorted({t for t in teacher_names if t and t in joined})
-        print(f"- {sheet}: teacher_hits={hits if hits else 'NONE'}")
+        hits = sorted(match_teachers(joined))
+        w(f"- {sheet}: teacher_hits={hits if hits else 'NONE'}\n")
 
+    sys.stdout.write(buf.getvalue())
     return 0
 
 
@@ -1,10 +1,37 @@
-import json
+import os
+from functools import lru_cache
 from pathlib import Path
 
-
-def _read_json(path: Path) -> dict:
-    with path.open("r", encoding="utf-8") as file:
-        return json.load(file)
+from _io_cache import read_json_cached
+
+
+@lru_cache(maxsize=None)
+def _dir_entries(directory: Path) -> frozenset[str]:
+    try:
+        with os.scandir(directory) as it:
+            # A dangling symlink is listed but doesn't exist; leave it out so the
+            # lookup falls back to exists() and reports it missing.
+            return frozenset(
+                entry.name for entry in it if not entry.is_symlink() or os.path.exists(entry.path)
+            )
+    except OSError:
+        return frozenset()
+
+
+def _exists_under(root: Path, relative: str) -> bool:
+    # Group and homeroom folders share a few parent directories, so list each parent
+    # once and check names against it instead of stat()-ing every folder.
+    parts = Path(relative).parts
+    if not parts or Path(relative).is_absolute() or any(p in (".", "..") for p in parts):
+        return (root / relative).exists()
+    current = root
+    for part in parts:
+        if part not in _dir_entries(current):
+            # Not listed under that exact name: let the filesystem decide
+            # (e.g. case-insensitive file systems) before reporting it missing.
+            return (root / relative).exists()
+        current = current / part
+    return True
 
 
 def _fail(messages: list[str]) -> int:
@@ -21,7 +48,7 @@ def main() -> int:
     if not groups_path.exists():
         return _fail(["Missing נתונים/הקבצות.json"])
 
-    groups_data = _read_json(groups_path)
+    groups_data = read_json_cached(groups_path)
     seen_folders: set[str] = set()
     for entry in (groups_data.get("groups") or []):
         folder = entry.get("folder")
@@ -35,20 +62,19 @@ def main() -> int:
 
         # Teachers may be missing; allow empty without failing validation.
 
-        if not (root / folder).exists():
+        if not _exists_under(root, folder):
             errors.append(f"Folder does not exist: {folder}")
 
     homerooms_path = root / "נתונים" / "כיתות_אם.json"
     if homerooms_path.exists():
-        homerooms_data = _read_json(homerooms_path)
+        homerooms_data = read_json_cached(homerooms_path)
         for entry in (homerooms_data.get("classes") or []):
             grade = entry.get("grade")
             homeroom_class = entry.get("homeroom_class")
             if not grade or not homeroom_class:
                 errors.append("Homeroom entry missing grade or homeroom_class")
                 continue
-            expected = root / "כיתות_אם" / grade / homeroom_class
-            if not expected.exists():
+            if not _exists_under(root, f"כיתות_אם/{grade}/{homeroom_class}"):
                 errors.append(f"Homeroom folder does not exist: כיתות_אם/{grade}/{homeroom_class}")
 
     if errors: